@@ -0,0 +1,160 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='api_author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user,
+                 group=cls.group if i % 2 else None)
+            for i in range(5))
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_post_list(self):
+        """Список постов без полного текста, поля - из LIST_FIELDS."""
+        response = self.client.get(reverse('api:post_list'))
+
+        data = response.json()
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNone(data['next'])
+        self.assertEqual(set(data['results'][0]), {
+            'id', 'headline', 'excerpt_html', 'pub_date', 'author', 'group',
+            'comment_count'})
+        self.assertEqual(data['results'][0]['author'], 'api_author')
+
+    def test_sparse_fields(self):
+        """?fields= ограничивает и ответ, и выбираемые столбцы."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                reverse('api:post_list'), {'fields': 'id,author'})
+
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'author'})
+        sql = ' '.join(query['sql'] for query in context)
+        self.assertNotIn('excerpt_html', sql)
+
+        response = self.client.get(
+            reverse('api:post_list'), {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pagination(self):
+        """Страницы по ссылке next идут подряд без повторов."""
+        ids = []
+        url = f'{reverse("api:post_list")}?limit=2&fields=id'
+        while url:
+            data = self.client.get(url).json()
+            ids.extend(post['id'] for post in data['results'])
+            url = data['next']
+
+        self.assertEqual(
+            ids, list(Post.objects.values_list('pk', flat=True)
+                      .order_by('-pub_date', '-pk')))
+
+    def test_cache_key_ignores_extra_params(self):
+        """Лишние параметры и порядок полей не создают новых записей
+        в кэше и не попадают в ссылку next.
+        """
+        url = reverse('api:post_list')
+        first = self.client.get(url, {'fields': 'id,author', 'limit': 2})
+
+        response = self.client.get(url, {
+            'fields': 'author,id,id', 'limit': '2', 'junk': 'x'})
+
+        # ключ кэша входит в ETag
+        self.assertEqual(response['ETag'], first['ETag'])
+        self.assertNotIn('junk', response.json()['next'])
+
+    def test_group_and_profile(self):
+        """Группа и профиль отдают описание и свои посты."""
+        data = self.client.get(
+            reverse('api:group_detail', args=('test-slug',))).json()
+        self.assertEqual(data['group']['title'], 'Тестовая группа')
+        self.assertEqual(len(data['results']), 2)
+
+        data = self.client.get(
+            reverse('api:profile_detail', args=('api_author',))).json()
+        self.assertEqual(data['author']['full_name'], 'Лев Толстой')
+        self.assertEqual(data['author']['post_count'], 5)
+
+        response = self.client.get(
+            reverse('api:group_detail', args=('missing',)))
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('error', response.json())
+
+    def test_post_detail(self):
+        """Пост отдаётся с полным текстом."""
+        post = Post.objects.first()
+        data = self.client.get(
+            reverse('api:post_detail', args=(post.pk,))).json()
+        self.assertEqual(data['text'], post.text)
+
+        response = self.client.get(reverse('api:post_detail', args=(0,)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_conditional_requests(self):
+        """Повторный запрос без изменений - 304 после одного запроса
+        к базе, за отметкой изменения ленты.
+        """
+        url = reverse('api:post_list')
+        etag = self.client.get(url)['ETag']
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(context), 1)
+
+        Post.objects.create(text='Новый пост', author=ApiTests.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 6)
+
+    def test_batch(self):
+        """batch отдаёт разные объекты за фиксированное число запросов."""
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        params = {
+            'posts': ','.join(map(str, post_ids + [0])) + ',abc',
+            'groups': 'test-slug,missing',
+            'profiles': 'api_author',
+            'fields': 'id,author',
+        }
+        with self.assertNumQueries(4):
+            data = self.client.get(reverse('api:batch'), params).json()
+
+        self.assertEqual(
+            data['posts'][str(post_ids[0])],
+            {'id': post_ids[0], 'author': 'api_author'})
+        self.assertIn('error', data['posts']['0'])
+        self.assertIn('error', data['posts']['abc'])
+        self.assertEqual(data['groups']['test-slug']['post_count'], 2)
+        self.assertIn('error', data['groups']['missing'])
+        self.assertEqual(data['profiles']['api_author']['post_count'], 5)
+
+    def test_batch_invalid_post_ids(self):
+        """Неверные id - ошибка в ответе, а не 500."""
+        keys = ['²', '١٢', '9' * 30, '9' * 5000]
+        response = self.client.get(
+            reverse('api:batch'), {'posts': ','.join(keys)})
+
+        self.assertEqual(response.status_code, 200)
+        for key in keys:
+            with self.subTest(key=key[:10]):
+                self.assertIn('error', response.json()['posts'][key])
+
+    def test_batch_size_cap(self):
+        """Слишком большой batch отклоняется."""
+        posts = ','.join(str(i) for i in range(101))
+        response = self.client.get(reverse('api:batch'), {'posts': posts})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,319 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.http import urlencode
+from django.views.decorators.http import require_safe
+
+from posts.feed import after, decode_cursor
+from posts.models import Group, Post, User
+from posts.syndication import cached_response
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# сколько всего объектов можно запросить в batch
+BATCH_MAX_ITEMS = 100
+# наибольший id поста: больше не помещается в столбец ключа
+MAX_POST_ID = 2 ** 63 - 1
+
+# имя поля в ответе -> поле в .values()
+POST_FIELDS = {
+    'id': 'pk',
+    'headline': 'headline',
+    'text': 'text',
+    'text_html': 'text_html',
+    'excerpt_html': 'excerpt_html',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'comment_count': 'comment_count',
+}
+LIST_FIELDS = (
+    'id', 'headline', 'excerpt_html', 'pub_date', 'author', 'group',
+    'comment_count',
+)
+DETAIL_FIELDS = (
+    'id', 'headline', 'text', 'text_html', 'pub_date', 'author', 'group',
+    'comment_count',
+)
+
+
+class BadRequest(Exception):
+    pass
+
+
+def api_view(view_func):
+    """Ошибки view отдаются в JSON, а не страницами сайта."""
+    @require_safe
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except Http404:
+            return JsonResponse({'error': 'Не найдено.'}, status=404)
+        except BadRequest as error:
+            return JsonResponse({'error': str(error)}, status=400)
+    return wrapper
+
+
+def dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def json_response(request, stream, build, *params):
+    """Ответ из кэша по пути и проверенным параметрам params, а не по
+    строке запроса: лишние параметры, их порядок и запись не создают
+    новых записей в кэше.
+    """
+    variant = ':'.join([request.path, *map(str, params)]).encode()
+    return cached_response(
+        request,
+        stream,
+        f'api:{hashlib.md5(variant).hexdigest()}',
+        lambda: dumps(build()),
+        'application/json',
+    )
+
+
+def get_fields(request, default):
+    """Поля из ?fields=id,author,...; без параметра - default.
+    Поля идут в порядке POST_FIELDS, без повторов.
+    """
+    value = request.GET.get('fields')
+    if not value:
+        return default
+    fields = {field.strip() for field in value.split(',') if field.strip()}
+    unknown = sorted(fields - set(POST_FIELDS))
+    if unknown:
+        raise BadRequest(f'Неизвестные поля: {", ".join(unknown)}.')
+    return tuple(field for field in POST_FIELDS if field in fields)
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', PAGE_SIZE))
+    except ValueError:
+        raise BadRequest('limit должен быть числом.')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def serialize(rows, fields):
+    """Словари ответа прямо из строк .values(), без объектов моделей."""
+    return [
+        {field: row[POST_FIELDS[field]] for field in fields} for row in rows
+    ]
+
+
+def format_cursor(pub_date, pk):
+    return f'{pub_date.isoformat()}_{pk}'
+
+
+def get_page_params(request):
+    """Проверенные параметры страницы: поля, размер и курсор ?before=
+    (неверный курсор - первая страница).
+    """
+    cursor = decode_cursor(request.GET.get('before'))
+    return (
+        get_fields(request, LIST_FIELDS),
+        get_limit(request),
+        cursor and format_cursor(*cursor),
+    )
+
+
+def get_page(request, queryset, params):
+    """Страница постов после курсора и ссылка на следующую.
+
+    Выбираются только запрошенные поля и ключ сортировки; ссылка
+    строится только из params.
+    """
+    fields, limit, cursor = params
+    cursor = decode_cursor(cursor)
+    lookups = {POST_FIELDS[field] for field in fields} | {'pk', 'pub_date'}
+    rows = list(
+        queryset.filter(after(cursor, 'pub_date', 'pk'))
+        .order_by('-pub_date', '-pk')
+        .values(*lookups)[:limit + 1]
+    )
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        query = {'before': format_cursor(last['pub_date'], last['pk'])}
+        if fields != LIST_FIELDS:
+            query['fields'] = ','.join(fields)
+        if limit != PAGE_SIZE:
+            query['limit'] = limit
+        next_url = f'{request.path}?{urlencode(query)}'
+    return {'results': serialize(rows, fields), 'next': next_url}
+
+
+@api_view
+def post_list(request):
+    params = get_page_params(request)
+    return json_response(
+        request, 'all', lambda: get_page(request, Post.objects.all(), params),
+        *params)
+
+
+@api_view
+def post_detail(request, post_id):
+    fields = get_fields(request, DETAIL_FIELDS)
+
+    def build():
+        queryset = Post.objects.filter(pk=post_id)
+        row = queryset.values(*{POST_FIELDS[field] for field in fields})
+        row = row.first()
+        if row is None:
+            raise Http404
+        return serialize([row], fields)[0]
+    return json_response(request, 'all', build, fields)
+
+
+@api_view
+def group_detail(request, slug):
+    group = get_object_or_404(
+        Group.objects.values('pk', 'slug', 'title', 'description'),
+        slug=slug)
+
+    params = get_page_params(request)
+
+    def build():
+        data = get_page(
+            request, Post.objects.filter(group_id=group['pk']), params)
+        data['group'] = {
+            'slug': group['slug'],
+            'title': group['title'],
+            'description': group['description'],
+        }
+        return data
+    return json_response(request, f'group:{group["pk"]}', build, *params)
+
+
+@api_view
+def profile_detail(request, username):
+    author = get_object_or_404(
+        User.objects.values('pk', 'username', 'first_name', 'last_name'),
+        username=username)
+
+    params = get_page_params(request)
+
+    def build():
+        posts = Post.objects.filter(author_id=author['pk'])
+        data = get_page(request, posts, params)
+        data['author'] = {
+            'username': author['username'],
+            'full_name': f'{author["first_name"]} {author["last_name"]}'
+            .strip(),
+            'post_count': posts.count(),
+        }
+        return data
+    return json_response(
+        request, f'author:{author["pk"]}', build, *params)
+
+
+def get_list(request, name):
+    return [item.strip() for item in request.GET.get(name, '').split(',')
+            if item.strip()]
+
+
+def get_attr(obj, lookup):
+    for name in lookup.split('__'):
+        if obj is None:
+            return None
+        obj = getattr(obj, name)
+    return obj
+
+
+def resolve(keys, found, serialize_item):
+    """Словарь ответа по ключам запроса: объект или ошибка."""
+    return {
+        str(key): serialize_item(found[key]) if key in found
+        else {'error': 'Не найдено.'}
+        for key in keys
+    }
+
+
+def parse_post_id(key):
+    """id поста из ключа batch или None. isdigit() верно и для '²',
+    поэтому берутся только цифры ASCII, и не длиннее MAX_POST_ID.
+    """
+    if not (key.isascii() and key.isdigit()):
+        return None
+    if len(key) > len(str(MAX_POST_ID)) or int(key) > MAX_POST_ID:
+        return None
+    return int(key)
+
+
+def batch_posts(request, keys):
+    fields = get_fields(request, LIST_FIELDS)
+    lookups = {POST_FIELDS[field] for field in fields}
+    post_ids = []
+    result = {}
+    for key in keys:
+        post_id = parse_post_id(key)
+        if post_id is None:
+            result[key] = {'error': 'Неверный id.'}
+        else:
+            post_ids.append(post_id)
+    related = {lookup.split('__')[0] for lookup in lookups if '__' in lookup}
+    posts = (
+        Post.objects.select_related(*related).only(*lookups, *related)
+        .in_bulk(post_ids)
+    )
+    result.update(resolve(post_ids, posts, lambda post: {
+        field: get_attr(post, POST_FIELDS[field]) for field in fields}))
+    return result
+
+
+def batch_groups(keys):
+    groups = Group.objects.select_related('stats').in_bulk(
+        keys, field_name='slug')
+    return resolve(keys, groups, lambda group: {
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+        'post_count': getattr(group, 'stats', None) and group.stats.post_count,
+    })
+
+
+def batch_profiles(keys):
+    authors = User.objects.only(
+        'username', 'first_name', 'last_name',
+    ).in_bulk(keys, field_name='username')
+    counts = dict(
+        Post.objects.filter(author__in=authors.values())
+        .order_by().values_list('author').annotate(count=Count('pk'))
+    )
+    return resolve(keys, authors, lambda author: {
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'post_count': counts.get(author.pk, 0),
+    })
+
+
+@api_view
+def batch(request):
+    """Посты, группы и профили за один запрос:
+    ?posts=1,2&groups=slug&profiles=username.
+
+    Каждый вид объектов выбирается одним in_bulk, ненайденные
+    отдаются с ошибкой, не ломая остальной ответ.
+    """
+    posts = get_list(request, 'posts')
+    groups = get_list(request, 'groups')
+    profiles = get_list(request, 'profiles')
+    if len(posts) + len(groups) + len(profiles) > BATCH_MAX_ITEMS:
+        raise BadRequest(
+            f'Можно запросить не больше {BATCH_MAX_ITEMS} объектов.')
+    data = {}
+    if posts:
+        data['posts'] = batch_posts(request, posts)
+    if groups:
+        data['groups'] = batch_groups(groups)
+    if profiles:
+        data['profiles'] = batch_profiles(profiles)
+    return JsonResponse(data, json_dumps_params={'ensure_ascii': False})
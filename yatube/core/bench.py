@@ -0,0 +1,21 @@
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import override_settings
+
+
+@contextmanager
+def bench_database(alias='default'):
+    """Создаёт на время замера отдельную тестовую базу,
+    чтобы не трогать рабочие данные.
+    """
+    connection = connections[alias]
+    old_name = connection.settings_dict['NAME']
+    # с DEBUG каждый запрос пишется в лог и в connection.queries
+    with override_settings(DEBUG=False):
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield connection
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,114 @@
+import math
+import random
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+LOCK_KEY = '{}:lock'
+# как часто ждущий запрос проверяет, не пересчитал ли значение другой
+WAIT_INTERVAL = 0.05
+
+_guard = threading.Lock()
+_local_locks = weakref.WeakValueDictionary()
+
+
+def _local_lock(key):
+    with _guard:
+        lock = _local_locks.get(key)
+        if lock is None:
+            lock = _local_locks[key] = threading.Lock()
+        return lock
+
+
+def should_refresh(entry, version, beta=None):
+    """Пора ли пересчитать запись (value, delta, expires, version).
+
+    Вероятностное раннее устаревание (XFetch): чем ближе expires и чем
+    дольше считалось значение (delta), тем вероятнее пересчёт, поэтому
+    запросы не приходят за одним ключом одновременно в момент expires.
+    """
+    if entry is None or entry[3] != version:
+        return True
+    _, delta, expires, _ = entry
+    beta = settings.CACHE_XFETCH_BETA if beta is None else beta
+    # 1 - random() лежит в (0, 1], логарифм не больше нуля
+    return time.time() - delta * beta * math.log(1 - random.random()) >= (
+        expires)
+
+
+def _wait(cache, key, version):
+    """Ждёт, пока значение пересчитает другой поток или процесс."""
+    deadline = time.monotonic() + settings.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        entry = cache.get(key)
+        if entry is not None and entry[3] == version:
+            return entry
+        time.sleep(WAIT_INTERVAL)
+    return None
+
+
+def _compute(cache, key, compute, timeout, stale, version):
+    start = time.monotonic()
+    value = compute()
+    delta = time.monotonic() - start
+    cache.set(
+        key, (value, delta, time.time() + timeout, version), timeout + stale)
+    return value
+
+
+def _refresh(cache, key, compute, timeout, stale, version, entry):
+    # значение мог только что пересчитать соседний поток
+    current = cache.get(key)
+    if (current is not None and current[3] == version
+            and (entry is None or current[2] != entry[2])):
+        return current[0]
+    lock_key = LOCK_KEY.format(key)
+    if cache.add(lock_key, True, settings.CACHE_LOCK_TIMEOUT):
+        try:
+            return _compute(cache, key, compute, timeout, stale, version)
+        finally:
+            cache.delete(lock_key)
+    # значение пересчитывает другой процесс
+    if entry is None:
+        entry = _wait(cache, key, version)
+    return compute() if entry is None else entry[0]
+
+
+def get_or_compute(key, compute, timeout, version=None, stale=None,
+                   cache=default_cache):
+    """cache.get_or_set(), которое не пускает пересчитывать значение
+    несколько запросов сразу.
+
+    Запись считается свежей timeout секунд и пока не изменилась version,
+    после этого ещё stale секунд (CACHE_STALE_SECONDS) она отдаётся тем,
+    кто пришёл, пока значение пересчитывает другой запрос. Если отдать
+    нечего, запрос ждёт чужого пересчёта и, если тот не закончился за
+    CACHE_LOCK_WAIT, считает сам.
+
+    Потоки процесса договариваются через threading.Lock, процессы - через
+    cache.add(): он атомарен в locmem, memcached и Redis; в файловом
+    кэше процессы изредка могут пересчитать значение вдвоём.
+    """
+    stale = settings.CACHE_STALE_SECONDS if stale is None else stale
+    entry = cache.get(key)
+    if not should_refresh(entry, version):
+        return entry[0]
+
+    lock = _local_lock(key)
+    if not lock.acquire(blocking=False):
+        if entry is not None:
+            return entry[0]
+        # пересчёт соседнего потока идёт не дольше CACHE_LOCK_TIMEOUT
+        if lock.acquire(timeout=settings.CACHE_LOCK_TIMEOUT):
+            lock.release()
+        entry = cache.get(key)
+        if entry is not None and entry[3] == version:
+            return entry[0]
+        return compute()
+    try:
+        return _refresh(cache, key, compute, timeout, stale, version, entry)
+    finally:
+        lock.release()
@@ -0,0 +1,149 @@
+import gzip
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/html', 'text/plain', 'text/css', 'text/xml', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml',
+    'application/rss+xml', 'application/atom+xml', 'image/svg+xml',
+)
+
+
+def get_encodings():
+    """Поддерживаемые сжатия в порядке предпочтения."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def parse_accept_encoding(header):
+    accepted = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(request):
+    accepted = parse_accept_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    best, best_quality = None, 0
+    for encoding in get_encodings():
+        quality = accepted.get(encoding, accepted.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def compress_stream(chunks, encoding, level):
+    """Сжимает поток по кускам; каждый кусок сбрасывается сразу, чтобы
+    потоковая страница не ждала заполнения буфера компрессора.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def has_secret(request, content_type):
+    """Страница с формой: в ней токен CSRF.
+
+    BREACH: если в одном сжатом ответе есть секрет и текст, который
+    задаёт атакующий (поиск, комментарии), секрет подбирается по длине
+    ответов. Django маскирует токен заново для каждого ответа, но
+    страницы с формами всё равно не сжимаются: они небольшие, а
+    ошибиться здесь дороже, чем недосжать.
+    """
+    return content_type == 'text/html' and request.META.get(
+        'CSRF_COOKIE_USED', False)
+
+
+def get_encoding(request, response):
+    """Сжатие для ответа или None, если его сжимать не нужно."""
+    patch_vary_headers(response, ('Accept-Encoding',))
+    content_type = response.get('Content-Type', '').split(';')[0].strip()
+    if (
+        response.has_header('Content-Encoding')
+        or content_type not in COMPRESSIBLE_TYPES
+        or has_secret(request, content_type)
+        or response.status_code in (204, 304)
+        or (not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE)
+    ):
+        return None
+    return choose_encoding(request)
+
+
+def set_compressed(response, data, encoding):
+    response.content = data
+    response['Content-Length'] = str(len(data))
+    response['Content-Encoding'] = encoding
+    etag = response.get('ETag')
+    if etag and not etag.startswith('W/'):
+        # байты отличаются от несжатого ответа
+        response['ETag'] = f'W/{etag}'
+
+
+def compress_response(request, response, levels=None):
+    encoding = get_encoding(request, response)
+    if encoding is None:
+        return response
+    level = (levels or settings.COMPRESSION_LEVELS)[encoding]
+    if response.streaming:
+        response.streaming_content = compress_stream(
+            response.streaming_content, encoding, level)
+        del response['Content-Length']
+        response['Content-Encoding'] = encoding
+        return response
+    data = compress(response.content, encoding, level)
+    if len(data) < len(response.content):
+        set_compressed(response, data, encoding)
+    return response
+
+
+def compress_cached(request, response, key, timeout):
+    """Сжимает ответ, тело которого лежит в кэше под key: сжатые байты
+    кэшируются рядом, и повторные ответы не сжимаются заново.
+    """
+    encoding = get_encoding(request, response)
+    if encoding is None:
+        return response
+    compressed_key = f'{key}:{encoding}'
+    data = cache.get(compressed_key)
+    if data is None:
+        data = compress(
+            response.content, encoding,
+            settings.COMPRESSION_CACHED_LEVELS[encoding])
+        cache.set(compressed_key, data, timeout)
+    set_compressed(response, data, encoding)
+    return response
@@ -0,0 +1,131 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueue:
+    """Очередь писем с фоновым отправителем.
+
+    Отправитель забирает письма пачками до EMAIL_QUEUE_BATCH_SIZE
+    и доставляет их через одно соединение EMAIL_QUEUE_BACKEND, которое
+    держится открытым, пока в очереди есть письма. Неотправленные после
+    EMAIL_QUEUE_MAX_RETRIES повторов письма сохраняются в
+    EMAIL_DEAD_LETTER_PATH.
+    """
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.worker = None
+        self.connection = None
+
+    def put(self, messages):
+        for message in messages:
+            self.queue.put(message)
+        with self.lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(
+                    target=self.run, name='mail-queue', daemon=True)
+                self.worker.start()
+
+    def flush(self, timeout=None):
+        """Ждёт, пока очередь опустеет. Возвращает True, если дождались."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + settings.EMAIL_QUEUE_FLUSH_INTERVAL
+        while len(batch) < settings.EMAIL_QUEUE_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            try:
+                self.deliver(batch)
+            except Exception:
+                logger.exception('Сбой очереди писем')
+            finally:
+                if self.queue.empty():
+                    self.close()
+                for _ in batch:
+                    self.queue.task_done()
+
+    def open(self):
+        if self.connection is None:
+            self.connection = get_connection(
+                settings.EMAIL_QUEUE_BACKEND, fail_silently=False)
+            self.connection.open()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                logger.exception('Не удалось закрыть соединение почты')
+            self.connection = None
+
+    def deliver(self, batch):
+        pending = batch
+        for attempt in range(settings.EMAIL_QUEUE_MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** attempt)
+            failed = []
+            for message in pending:
+                try:
+                    self.open().send_messages([message])
+                except Exception:
+                    logger.warning('Письмо не отправлено', exc_info=True)
+                    self.close()
+                    failed.append(message)
+            if not failed:
+                return
+            pending = failed
+        self.dead_letter(pending)
+
+    def dead_letter(self, messages):
+        path = settings.EMAIL_DEAD_LETTER_PATH
+        os.makedirs(path, exist_ok=True)
+        for message in messages:
+            filename = os.path.join(
+                path, f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4()}.eml')
+            with open(filename, 'wb') as file:
+                file.write(message.message().as_bytes())
+        logger.error('Писем в dead letter: %s', len(messages))
+
+
+mail_queue = MailQueue()
+atexit.register(mail_queue.flush, timeout=5)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Backend, который только ставит письма в очередь и сразу
+    возвращает управление view.
+    """
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        mail_queue.put(email_messages)
+        return len(email_messages)
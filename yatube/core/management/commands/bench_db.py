@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+SEED_ROWS = 1000
+
+
+class Worker(threading.Thread):
+    def __init__(self, profile, path, deadline, write):
+        super().__init__(daemon=True)
+        self.profile = profile
+        self.path = path
+        self.deadline = deadline
+        self.write = write
+        self.done = 0
+        self.locked = 0
+
+    def connect(self):
+        conn = sqlite3.connect(
+            self.path, timeout=self.profile['timeout'],
+            isolation_level=None)
+        for name, value in self.profile['pragmas'].items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def operation(self, conn):
+        if self.write:
+            conn.execute(
+                'INSERT INTO post (text, pub_date) VALUES (?, ?)',
+                ('x' * 200, time.time()))
+        else:
+            conn.execute(
+                'SELECT id, text FROM post ORDER BY id DESC LIMIT 10'
+            ).fetchall()
+
+    def run(self):
+        conn = self.connect()
+        while time.monotonic() < self.deadline:
+            if not self.profile['persistent']:
+                conn.close()
+                conn = self.connect()
+            try:
+                self.operation(conn)
+                self.done += 1
+            except sqlite3.OperationalError:
+                self.locked += 1
+        conn.close()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite без настройки '
+            'и с профилем из settings при конкурентной записи.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=3.0)
+
+    def get_profiles(self):
+        tuned = settings.DB_PROFILES['sqlite']
+        return {
+            # так Django работал до появления профилей:
+            # новое соединение на запрос, журнал DELETE, timeout 5 с
+            'bare': {
+                'timeout': 5,
+                'pragmas': {},
+                'persistent': False,
+            },
+            'tuned': {
+                'timeout': tuned['OPTIONS']['timeout'],
+                'pragmas': settings.SQLITE_PRAGMAS,
+                'persistent': bool(tuned['CONN_MAX_AGE']),
+            },
+        }
+
+    def run_profile(self, profile, options):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.sqlite3')
+            conn = sqlite3.connect(path, isolation_level=None)
+            conn.execute(
+                'CREATE TABLE post (id INTEGER PRIMARY KEY, '
+                'text TEXT, pub_date REAL)')
+            conn.executemany(
+                'INSERT INTO post (text, pub_date) VALUES (?, ?)',
+                (('x' * 200, time.time()) for _ in range(SEED_ROWS)))
+            conn.close()
+
+            deadline = time.monotonic() + options['seconds']
+            workers = (
+                [Worker(profile, path, deadline, True)
+                 for _ in range(options['writers'])]
+                + [Worker(profile, path, deadline, False)
+                   for _ in range(options['readers'])]
+            )
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        writes = sum(w.done for w in workers if w.write)
+        reads = sum(w.done for w in workers if not w.write)
+        locked = sum(w.locked for w in workers)
+        return writes, reads, locked
+
+    def handle(self, *args, **options):
+        seconds = options['seconds']
+        self.stdout.write(
+            f'{"profile":<8}{"writes/s":>12}{"reads/s":>12}{"locked":>10}')
+        for name, profile in self.get_profiles().items():
+            writes, reads, locked = self.run_profile(profile, options)
+            self.stdout.write(
+                f'{name:<8}{writes / seconds:>12.0f}'
+                f'{reads / seconds:>12.0f}{locked:>10}')
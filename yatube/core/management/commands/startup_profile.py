@@ -0,0 +1,102 @@
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# то, что рабочий процесс делает до первого запроса
+BOOT_SCRIPT = '''
+import os, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import reverse
+reverse('posts:index')
+print(time.perf_counter() - start)
+'''
+
+
+def parse_importtime(lines):
+    """Вывод -X importtime -> [(модуль, собственное, общее время в мкс)]."""
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            # заголовок таблицы
+            continue
+        modules.append((name.strip(), int(own), int(cumulative)))
+    return modules
+
+
+def package_of(name):
+    parts = name.split('.')
+    if parts[:2] == ['django', 'contrib']:
+        return '.'.join(parts[:3])
+    if parts[0] == 'django':
+        return '.'.join(parts[:2])
+    return parts[0]
+
+
+def by_package(modules):
+    totals = defaultdict(int)
+    for name, own, _ in modules:
+        totals[package_of(name)] += own
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+class Command(BaseCommand):
+    help = ('Запускает WSGI-приложение в отдельном процессе и показывает, '
+            'сколько стоит импорт модулей при старте.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=15)
+        parser.add_argument(
+            '--sort', choices=('self', 'cumulative'), default='self')
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Сколько раз запускать; берётся самый быстрый запуск.')
+
+    def boot(self):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+            cwd=settings.BASE_DIR,
+            capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        setup = float(result.stdout.strip().splitlines()[-1])
+        return elapsed, setup, parse_importtime(result.stderr.splitlines())
+
+    def handle(self, *args, **options):
+        elapsed, setup, modules = min(
+            self.boot() for _ in range(max(options['repeat'], 1)))
+        limit = options['limit']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'Процесс {elapsed * 1000:.0f} мс, '
+            f'Django {setup * 1000:.0f} мс, модулей {len(modules)}'))
+
+        column = 1 if options['sort'] == 'self' else 2
+        self.stdout.write(f'{"self, мс":>10}{"cumul., мс":>12}  модуль')
+        for name, own, cumulative in sorted(
+                modules, key=lambda row: -row[column])[:limit]:
+            self.stdout.write(
+                f'{own / 1000:>10.1f}{cumulative / 1000:>12.1f}  {name}')
+
+        self.stdout.write(f'{"self, мс":>10}  пакет')
+        for package, own in by_package(modules)[:limit]:
+            self.stdout.write(f'{own / 1000:>10.1f}  {package}')
+
+        imported = {name: cumulative for name, _, cumulative in modules}
+        if 'distutils' in imported and '_distutils_hack' in imported:
+            # django.utils.version импортирует distutils, а setuptools
+            # подменяет его своей копией вместе с pkg_resources
+            self.stdout.write(self.style.WARNING(
+                f'distutils загружен из setuptools за '
+                f'{imported["distutils"] / 1000:.0f} мс, запускайте '
+                f'процессы с SETUPTOOLS_USE_DISTUTILS=stdlib'))
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.replicas import sync_sqlite_replicas
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite в файлы реплик.'
+
+    def handle(self, *args, **options):
+        sync_sqlite_replicas()
+        self.stdout.write(
+            f'Синхронизировано реплик: {len(settings.REPLICA_DATABASES)}')
@@ -0,0 +1,54 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.memory import get_children, read_memory
+
+MB = 2 ** 20
+
+
+def format_mb(value):
+    return '-' if value is None else f'{value / MB:.1f}'
+
+
+class Command(BaseCommand):
+    help = ('Показывает память мастер-процесса gunicorn и его рабочих '
+            'процессов: rss, pss и uss (только свои страницы).')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pidfile',
+            default=os.getenv('GUNICORN_PIDFILE', '/tmp/yatube-gunicorn.pid'))
+        parser.add_argument('--pid', type=int, help='pid мастер-процесса')
+
+    def get_master(self, options):
+        if options['pid']:
+            return options['pid']
+        try:
+            with open(options['pidfile']) as file:
+                return int(file.read())
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Нет pid мастер-процесса: {error}')
+
+    def handle(self, *args, **options):
+        master = self.get_master(options)
+        workers = get_children(master)
+        self.stdout.write(
+            f'{"pid":>8}{"rss, МБ":>10}{"pss, МБ":>10}{"uss, МБ":>10}')
+        total = None
+        for role, pid in [('master', master)] + [
+                ('worker', pid) for pid in workers]:
+            try:
+                memory = read_memory(pid)
+            except OSError:
+                continue
+            self.stdout.write(
+                f'{pid:>8}{format_mb(memory["rss"]):>10}'
+                f'{format_mb(memory["pss"]):>10}'
+                f'{format_mb(memory["uss"]):>10}  {role}')
+            if role == 'worker' and memory['uss'] is not None:
+                total = (total or 0) + memory['uss']
+        if workers and total is not None:
+            self.stdout.write(
+                f'Рабочих процессов: {len(workers)}, собственная память '
+                f'в среднем {format_mb(total / len(workers))} МБ')
@@ -0,0 +1,54 @@
+import os
+
+# строки /proc/<pid>/smaps_rollup, из которых складываются rss, pss, uss
+SMAPS_FIELDS = {
+    'Rss': 'rss',
+    'Pss': 'pss',
+    'Private_Clean': 'uss',
+    'Private_Dirty': 'uss',
+}
+
+
+def read_memory(pid='self'):
+    """Память процесса в байтах.
+
+    uss - страницы, которые есть только у этого процесса: столько
+    освободится, если его завершить. pss делит общие страницы поровну
+    между процессами, которые их используют. Без smaps_rollup (ядро
+    старше 4.14) известен только rss.
+    """
+    memory = dict.fromkeys(('rss', 'pss', 'uss'), 0)
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as file:
+            for line in file:
+                name, _, value = line.partition(':')
+                if name in SMAPS_FIELDS:
+                    memory[SMAPS_FIELDS[name]] += int(value.split()[0]) * 1024
+        return memory
+    except FileNotFoundError:
+        pass
+    memory.update(pss=None, uss=None)
+    with open(f'/proc/{pid}/status') as file:
+        for line in file:
+            if line.startswith('VmRSS:'):
+                memory['rss'] = int(line.split()[1]) * 1024
+    return memory
+
+
+def get_children(pid):
+    """pid дочерних процессов pid по /proc/*/stat."""
+    children = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as file:
+                stat = file.read()
+        except OSError:
+            # процесс успел завершиться
+            continue
+        # имя процесса в скобках может содержать пробелы
+        ppid = int(stat.rsplit(')', 1)[1].split()[1])
+        if ppid == pid:
+            children.append(int(name))
+    return sorted(children)
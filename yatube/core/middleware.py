@@ -0,0 +1,88 @@
+import time
+
+from django.conf import settings
+
+from .compression import compress_response
+from .routers import use_replicas
+from .throttling import check_rule
+
+PIN_COOKIE = 'replica_pin'
+
+
+def is_pinned(request):
+    """Клиент недавно писал и должен читать с основной базы."""
+    try:
+        pinned_until = float(request.COOKIES.get(PIN_COOKIE, 0))
+    except ValueError:
+        return False
+    return pinned_until > time.time()
+
+
+class ReplicaRoutingMiddleware:
+    """Направляет страницы из REPLICA_READ_VIEWS в реплики.
+
+    После POST на страницы из REPLICA_PIN_VIEWS клиент получает cookie,
+    и до её истечения все его запросы читают с основной базы.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            use_replicas(False)
+        match = request.resolver_match
+        if (
+            request.method == 'POST'
+            and match is not None
+            and match.view_name in settings.REPLICA_PIN_VIEWS
+        ):
+            pin_seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, str(time.time() + pin_seconds),
+                max_age=pin_seconds, httponly=True)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.resolver_match.view_name
+            in settings.REPLICA_READ_VIEWS
+            and not is_pinned(request)
+        ):
+            use_replicas()
+
+
+class ThrottleMiddleware:
+    """Ограничивает частоту запросов к страницам из THROTTLE_RULES."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.THROTTLE_ENABLED:
+            return None
+        view_name = request.resolver_match.view_name
+        rule = settings.THROTTLE_RULES.get(view_name)
+        if rule is None:
+            return None
+        return check_rule(request, view_name, rule)
+
+
+class CompressionMiddleware:
+    """Сжимает ответы gzip или brotli (если установлен пакет brotli).
+
+    Ответы меньше COMPRESSION_MIN_SIZE, уже сжатые (например, из
+    кэша, см. core.compression) и страницы с формами (см.
+    compression.has_secret) не трогает; потоковые ответы сжимает
+    по кускам. HTML-страницы сжимаются на каждый ответ: в них шапка
+    пользователя, и готовыми они в кэше не хранятся.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return compress_response(request, self.get_response(request))
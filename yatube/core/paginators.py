@@ -0,0 +1,103 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+
+# больше этого числа строк отфильтрованный список не пересчитывает
+ESTIMATED_COUNT_CAP = 10000
+KEYSET_ANCHOR_TIMEOUT = 60 * 30
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator без полного COUNT(*) по большой таблице.
+
+    Для списка без фильтров число строк берётся из статистики базы,
+    для отфильтрованного - считается не дальше ESTIMATED_COUNT_CAP.
+    Оценку по небольшой таблице уточняет COUNT не дальше того же порога.
+    """
+    count_cap = ESTIMATED_COUNT_CAP
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.where:
+            return queryset[:self.count_cap].count()
+        return self.estimate_table_size(queryset)
+
+    def estimate_table_size(self, queryset):
+        model = queryset.model
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE relname = %s',
+                    [model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] > 0:
+                estimate = int(row[0])
+                return self.clamp(queryset, estimate)
+        # MAX по первичному ключу берётся из индекса, а не сканом; после
+        # удалений он больше числа строк
+        estimate = queryset.aggregate(size=Max('pk'))['size'] or 0
+        return self.clamp(queryset, estimate)
+
+    def clamp(self, queryset, estimate):
+        if estimate > self.count_cap:
+            return estimate
+        return queryset[:self.count_cap].count()
+
+
+class KeysetPaginator(EstimatedCountPaginator):
+    """Paginator, который переходит на следующую страницу по ключу.
+
+    Последняя строка каждой отданной страницы запоминается в кэше, и
+    следующая страница выбирается условием по keyset_ordering вместо
+    OFFSET. Если якоря нет или сортировка другая, работает как обычно.
+    """
+    keyset_ordering = ('-pk',)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        queryset = self.object_list
+        anchor = None
+        if tuple(queryset.query.order_by) == self.keyset_ordering:
+            anchor = cache.get(self.anchor_key(number))
+        if anchor is None:
+            bottom = (number - 1) * self.per_page
+            page_list = queryset[bottom:bottom + self.per_page]
+        else:
+            page_list = queryset.filter(self.after(anchor))[:self.per_page]
+        self.remember_anchor(number + 1, page_list)
+        return self._get_page(page_list, number, self)
+
+    def fields(self):
+        return [field.lstrip('-') for field in self.keyset_ordering]
+
+    def anchor_key(self, number):
+        query = str(self.object_list.query).encode()
+        digest = hashlib.md5(query).hexdigest()
+        return f'keyset:{digest}:{self.per_page}:{number}'
+
+    def remember_anchor(self, number, page_list):
+        if (
+            tuple(self.object_list.query.order_by) != self.keyset_ordering
+            or len(page_list) < self.per_page
+        ):
+            return
+        last = page_list[len(page_list) - 1]
+        anchor = [getattr(last, field) for field in self.fields()]
+        cache.set(self.anchor_key(number), anchor, KEYSET_ANCHOR_TIMEOUT)
+
+    def after(self, anchor):
+        """Условие "строго после anchor" для keyset_ordering."""
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.keyset_ordering, anchor):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
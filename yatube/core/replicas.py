@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.db import connections
+
+
+def sync_sqlite_replicas(source='default'):
+    """Копирует базу SQLite source во все REPLICA_DATABASES.
+
+    Нужна для локальной работы и тестов, где реплики - просто файлы,
+    а не настоящая репликация.
+    """
+    source_connection = connections[source]
+    source_connection.ensure_connection()
+    for alias in settings.REPLICA_DATABASES:
+        target = connections[alias]
+        if target.vendor != 'sqlite':
+            continue
+        target.ensure_connection()
+        source_connection.connection.backup(target.connection)
@@ -0,0 +1,40 @@
+import random
+import threading
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def use_replicas(enabled=True):
+    """Разрешает или запрещает чтение с реплик в текущем потоке."""
+    _state.replicas = enabled
+
+
+def replicas_enabled():
+    return getattr(_state, 'replicas', False)
+
+
+class ReplicaRouter:
+    """Отправляет чтение в реплики, если это разрешил
+    ReplicaRoutingMiddleware, а всё остальное - в основную базу.
+    """
+    # сессии пишутся при каждом входе, реплика может отстать
+    primary_apps = ('sessions',)
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if (
+            replicas
+            and replicas_enabled()
+            and model._meta.app_label not in self.primary_apps
+        ):
+            return random.choice(replicas)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # все базы содержат одни и те же данные
+        return True
@@ -0,0 +1,42 @@
+import uuid
+
+from django.http import StreamingHttpResponse
+from django.template.loader import get_template, render_to_string
+from django.utils.safestring import mark_safe
+
+from .routers import replicas_enabled, use_replicas
+
+
+def stream_render(request, template_name, context, items, item_template,
+                  item_context=None):
+    """Как render(), но элементы items выводятся по мере выборки.
+
+    Страница рендерится один раз с маркером stream_marker на месте
+    списка: всё до маркера отдаётся сразу, затем по item_template на
+    каждый элемент (без контекст-процессоров), затем остаток страницы.
+    В item_template элемент доступен как item, первый - с first=True.
+
+    items выбираются уже после того, как ReplicaRoutingMiddleware
+    вернула поток на основную базу, поэтому на время выборки
+    восстанавливается разрешение читать с реплик, как у самого view.
+    """
+    marker = f'<!--stream-{uuid.uuid4().hex}-->'
+    page = render_to_string(
+        template_name, {**context, 'stream_marker': mark_safe(marker)},
+        request)
+    head, tail = page.split(marker, 1)
+    template = get_template(item_template)
+    item_context = item_context or {}
+    replicas = replicas_enabled()
+
+    def content():
+        yield head
+        use_replicas(replicas)
+        try:
+            for number, item in enumerate(items):
+                yield template.render(
+                    {**item_context, 'item': item, 'first': number == 0})
+        finally:
+            use_replicas(False)
+        yield tail
+    return StreamingHttpResponse(content())
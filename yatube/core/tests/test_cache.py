@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, override_settings
+
+from ..cache import LOCK_KEY, get_or_compute, should_refresh
+
+THREADS = 20
+
+
+class Counter:
+    """compute() для тестов: считает вызовы и работает delay секунд."""
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return 'новое'
+
+
+@override_settings(CACHE_LOCK_WAIT=2, CACHE_XFETCH_BETA=0)
+class GetOrComputeTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        self.caches = {
+            'locmem': LocMemCache('stampede', {}),
+            'file': FileBasedCache(tmp, {}),
+        }
+        # хранилище locmem общее для всех кэшей с тем же именем
+        self.caches['locmem'].clear()
+
+    def run_threads(self, cache, compute, version=None):
+        results = []
+        barrier = threading.Barrier(THREADS)
+
+        def request():
+            barrier.wait()
+            results.append(get_or_compute(
+                'feed', compute, 60, version=version, cache=cache))
+
+        threads = [threading.Thread(target=request) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_single_flight(self):
+        """Одновременные промахи считают значение один раз."""
+        for name, cache in self.caches.items():
+            with self.subTest(cache=name):
+                compute = Counter()
+
+                results = self.run_threads(cache, compute)
+
+                self.assertEqual(compute.calls, 1)
+                self.assertEqual(results, ['новое'] * THREADS)
+
+    def test_stale_while_revalidate(self):
+        """Пока значение пересчитывается, остальные получают старое."""
+        for name, cache in self.caches.items():
+            with self.subTest(cache=name):
+                cache.set('feed', ('старое', 0.1, time.time() + 60, 1))
+                compute = Counter()
+
+                results = self.run_threads(cache, compute, version=2)
+
+                self.assertEqual(compute.calls, 1)
+                self.assertEqual(results.count('новое'), 1)
+                self.assertEqual(results.count('старое'), THREADS - 1)
+                self.assertEqual(
+                    get_or_compute('feed', compute, 60, version=2,
+                                   cache=cache),
+                    'новое')
+
+    def test_fresh_value_is_not_recomputed(self):
+        cache = self.caches['locmem']
+        compute = Counter(delay=0)
+        get_or_compute('feed', compute, 60, cache=cache)
+        get_or_compute('feed', compute, 60, cache=cache)
+
+        self.assertEqual(compute.calls, 1)
+
+    def test_other_process_recomputes(self):
+        """Если пересчитывает другой процесс, отдаётся старое значение,
+        а без него запрос ждёт CACHE_LOCK_WAIT и считает сам.
+        """
+        cache = self.caches['locmem']
+        cache.add(LOCK_KEY.format('feed'), True)
+        compute = Counter(delay=0)
+        cache.set('feed', ('старое', 0.1, time.time() - 1, None))
+
+        self.assertEqual(
+            get_or_compute('feed', compute, 60, cache=cache), 'старое')
+        self.assertEqual(compute.calls, 0)
+
+        cache.delete('feed')
+        with override_settings(CACHE_LOCK_WAIT=0.1):
+            self.assertEqual(
+                get_or_compute('feed', compute, 60, cache=cache), 'новое')
+        self.assertEqual(compute.calls, 1)
+
+    def test_early_expiration(self):
+        """XFetch пересчитывает долгое значение до срока."""
+        entry = ('значение', 2.0, time.time() + 1, None)
+        with mock.patch('core.cache.random.random', return_value=0.9):
+            self.assertTrue(should_refresh(entry, None, beta=1))
+            self.assertFalse(should_refresh(entry, None, beta=0))
+        with mock.patch('core.cache.random.random', return_value=0.0):
+            self.assertFalse(should_refresh(entry, None, beta=1))
+        self.assertTrue(should_refresh(entry, 'другая версия', beta=0))
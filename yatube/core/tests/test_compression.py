@@ -0,0 +1,119 @@
+import gzip
+import zlib
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post, User
+
+from .. import compression
+from ..middleware import CompressionMiddleware
+
+BODY = 'Пост про сжатие. ' * 100
+
+
+class CompressionTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, accept='gzip, deflate'):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_choose_encoding(self):
+        """Сжатие выбирается по Accept-Encoding с учётом q."""
+        cases = {
+            '': None,
+            'gzip': 'gzip',
+            'gzip;q=0': None,
+            'identity': None,
+            '*': compression.get_encodings()[0],
+            'br;q=1.0, gzip;q=0.5': compression.get_encodings()[0],
+        }
+        for accept, expected in cases.items():
+            with self.subTest(accept=accept):
+                request = self.factory.get(
+                    '/', HTTP_ACCEPT_ENCODING=accept)
+                self.assertEqual(
+                    compression.choose_encoding(request), expected)
+
+    def test_gzip_response(self):
+        """Ответ сжимается, ETag становится слабым, Vary выставлен."""
+        response = HttpResponse(BODY)
+        response['ETag'] = '"tag"'
+        response = self.process(response)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], 'W/"tag"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content).decode(), BODY)
+
+    @override_settings(COMPRESSION_MIN_SIZE=10000)
+    def test_small_and_binary_responses_not_compressed(self):
+        """Маленькие и несжимаемые ответы отдаются как есть."""
+        response = self.process(HttpResponse(BODY))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        response = self.process(
+            HttpResponse(b'\x89PNG' * 5000, content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response(self):
+        """Поток сжимается по кускам, каждый кусок сразу доступен."""
+        chunks = [f'кусок {i} '.encode() * 50 for i in range(5)]
+        response = self.process(StreamingHttpResponse(iter(chunks)))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        decompressor = zlib.decompressobj(31)
+        first = next(iter(response.streaming_content))
+        self.assertEqual(decompressor.decompress(first), chunks[0])
+        rest = b''.join(response.streaming_content)
+        self.assertEqual(
+            decompressor.decompress(rest) + decompressor.flush(),
+            b''.join(chunks[1:]))
+
+    def test_event_stream_not_compressed(self):
+        """SSE не сжимается: события должны уходить без буферизации."""
+        response = self.process(StreamingHttpResponse(
+            iter([b'data: 1\n\n']), content_type='text/event-stream'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_page_with_form_not_compressed(self):
+        """Страница с токеном CSRF не сжимается (BREACH)."""
+        response = self.client.get(
+            reverse('users:signup'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+
+class CachedCompressionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='compressor')
+        for i in range(10):
+            Post.objects.create(text=BODY, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client(HTTP_ACCEPT_ENCODING='gzip')
+
+    def test_cached_feed_compressed_once(self):
+        """Лента сжимается один раз, дальше сжатые байты из кэша."""
+        url = reverse('posts:rss')
+        with mock.patch.object(
+                compression, 'compress', wraps=compression.compress) as spy:
+            first = self.client.get(url)
+            second = self.client.get(url)
+
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(second['Content-Encoding'], 'gzip')
+        self.assertEqual(first.content, second.content)
+        self.assertIn(
+            'Пост про сжатие', gzip.decompress(second.content).decode())
@@ -0,0 +1,45 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+
+class SQLitePragmasTests(TestCase):
+    def get_pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_to_connection(self):
+        """Новое соединение SQLite получает PRAGMA из настроек."""
+        if connection.vendor != 'sqlite':
+            self.skipTest('PRAGMA есть только у SQLite')
+        # synchronous=NORMAL хранится как 1
+        self.assertEqual(self.get_pragma('synchronous'), 1)
+        self.assertEqual(self.get_pragma('cache_size'), -64 * 1024)
+        # temp_store=MEMORY хранится как 2
+        self.assertEqual(self.get_pragma('temp_store'), 2)
+
+
+class KeepTestDatabaseTests(SimpleTestCase):
+    def test_parallel_keepdb(self):
+        """Копии сохранённой тестовой базы для --parallel не пустые."""
+        if settings.DB_PROFILE != 'sqlite':
+            self.skipTest('тестовая база в файле только у SQLite')
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        env = dict(os.environ, SQLITE_PATH=os.path.join(tmp, 'db.sqlite3'))
+
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'test', 'users.tests',
+             '--parallel', '2', '--keepdb'],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertTrue(
+            os.path.exists(os.path.join(tmp, 'test_db.sqlite3')))
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.mail import mail_queue
+from posts.models import User
+
+
+class SlowEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        time.sleep(0.5)
+        return super().send_messages(messages)
+
+
+class BrokenEmailBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('relay is down')
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_QUEUE_BACKEND='core.tests.test_mail.SlowEmailBackend',
+    EMAIL_QUEUE_FLUSH_INTERVAL=0,
+    EMAIL_QUEUE_RETRY_DELAY=0,
+)
+class QueuedEmailBackendTests(TestCase):
+    def setUp(self):
+        self.dead_letter_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dead_letter_path)
+
+    def test_password_reset_does_not_wait_for_relay(self):
+        """Сброс пароля отвечает, не дожидаясь медленной почты."""
+        User.objects.create_user(
+            username='mailer', email='mailer@yatube.ru', password='pass')
+
+        started = time.monotonic()
+        response = self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'mailer@yatube.ru'})
+        elapsed = time.monotonic() - started
+
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertLess(elapsed, 0.5)
+        self.assertTrue(mail_queue.flush(timeout=5))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['mailer@yatube.ru'])
+
+    def test_undeliverable_mail_goes_to_dead_letter(self):
+        """Письмо, которое не удалось отправить, сохраняется на диск."""
+        with self.settings(
+            EMAIL_QUEUE_BACKEND='core.tests.test_mail.BrokenEmailBackend',
+            EMAIL_DEAD_LETTER_PATH=self.dead_letter_path,
+            EMAIL_QUEUE_MAX_RETRIES=2,
+        ), self.assertLogs('core.mail', 'WARNING') as logs:
+            mail.send_mail('Тема', 'Текст', 'from@yatube.ru',
+                           ['to@yatube.ru'])
+            self.assertTrue(mail_queue.flush(timeout=5))
+
+        # первая попытка и два повтора
+        self.assertEqual(
+            sum('не отправлено' in line for line in logs.output), 3)
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(len(os.listdir(self.dead_letter_path)), 1)
@@ -0,0 +1,140 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.sessions.models import Session
+from django.db import connections
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import resolve, reverse
+
+from core.middleware import PIN_COOKIE, ReplicaRoutingMiddleware
+from core.replicas import sync_sqlite_replicas
+from core.routers import ReplicaRouter, use_replicas
+from core.streaming import stream_render
+from posts.models import Post, User
+
+
+@override_settings(REPLICA_DATABASES=['replica1'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.middleware = ReplicaRoutingMiddleware(lambda request: None)
+        self.factory = RequestFactory()
+        self.addCleanup(use_replicas, False)
+
+    def route(self, request):
+        request.resolver_match = resolve(request.path)
+        self.middleware.process_view(request, None, (), {})
+        return self.router.db_for_read(Post)
+
+    def test_read_goes_to_primary_by_default(self):
+        """Без разрешения middleware чтение идёт в основную базу."""
+        self.assertIsNone(self.router.db_for_read(Post))
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_read_only_view_goes_to_replica(self):
+        """Страницы из REPLICA_READ_VIEWS читают с реплики."""
+        request = self.factory.get(reverse('posts:index'))
+        self.assertEqual(self.route(request), 'replica1')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertIsNone(self.router.db_for_read(Session))
+
+    def test_write_view_stays_on_primary(self):
+        """Страница создания поста читает с основной базы."""
+        request = self.factory.get(reverse('posts:post_create'))
+        self.assertIsNone(self.route(request))
+
+    def test_pinned_client_reads_from_primary(self):
+        """После записи клиент читает с основной базы."""
+        request = self.factory.get(reverse('posts:index'))
+        request.COOKIES[PIN_COOKIE] = '9999999999'
+        self.assertIsNone(self.route(request))
+
+    def test_streamed_items_read_from_replica(self):
+        """Элементы потоковой страницы выбираются уже после middleware,
+        но тоже с реплики.
+        """
+        routed = []
+
+        def items():
+            routed.append(self.router.db_for_read(Post))
+            yield 'пост'
+
+        use_replicas()
+        with mock.patch('core.streaming.render_to_string',
+                        lambda name, context, request: (
+                            f'<{context["stream_marker"]}>')), \
+                mock.patch('core.streaming.get_template'):
+            response = stream_render(
+                None, 'page.html', {}, items(), 'item.html')
+        # так поток возвращает ReplicaRoutingMiddleware
+        use_replicas(False)
+        b''.join(response.streaming_content)
+
+        self.assertEqual(routed, ['replica1'])
+        self.assertIsNone(self.router.db_for_read(Post))
+
+
+class ReplicaPinCookieTests(TestCase):
+    def test_post_create_sets_pin_cookie(self):
+        """POST на создание поста выставляет cookie привязки."""
+        user = User.objects.create_user(username='replica_user')
+        client = Client()
+        client.force_login(user)
+        response = client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'})
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+
+REPLICAS = ['replica1', 'replica2']
+
+
+@override_settings(REPLICA_DATABASES=REPLICAS)
+class ReplicaReadYourWritesTests(TransactionTestCase):
+    """Реплики - временные файлы SQLite, которые наполняет
+    sync_sqlite_replicas(); DB_REPLICAS в тестах не используется.
+    """
+    databases = {'default', *REPLICAS}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        for alias in REPLICAS:
+            connections.databases[alias] = {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': os.path.join(cls.tmp, f'{alias}.sqlite3'),
+            }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in REPLICAS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
+        shutil.rmtree(cls.tmp)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='replica_author')
+        sync_sqlite_replicas()
+        self.post = Post.objects.create(text='Только что', author=self.author)
+
+    def test_replica_lags_until_synced(self):
+        """Реплика видит пост только после синхронизации,
+           а привязанный клиент - сразу.
+        """
+        url = reverse('posts:index')
+        response = self.client.get(url)
+        self.assertNotIn(self.post, response.context['page_obj'])
+
+        pinned = Client()
+        pinned.cookies[PIN_COOKIE] = '9999999999'
+        response = pinned.get(url)
+        self.assertIn(self.post, response.context['page_obj'])
+
+        sync_sqlite_replicas()
+        response = self.client.get(url)
+        self.assertIn(self.post, response.context['page_obj'])
@@ -0,0 +1,25 @@
+from django.test import SimpleTestCase
+
+from ..management.commands.startup_profile import (by_package,
+                                                   parse_importtime)
+
+
+class StartupProfileTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        """Разбор -X importtime группирует модули по пакетам."""
+        modules = parse_importtime([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       100 |        100 |   posts.models',
+            'import time:       300 |        400 | posts',
+            'import time:        50 |         50 | django.contrib.auth.forms',
+            'другая строка',
+        ])
+
+        self.assertEqual(modules, [
+            ('posts.models', 100, 100),
+            ('posts', 300, 400),
+            ('django.contrib.auth.forms', 50, 50),
+        ])
+        self.assertEqual(
+            by_package(modules),
+            [('posts', 400), ('django.contrib.auth', 50)])
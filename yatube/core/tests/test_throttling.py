@@ -0,0 +1,114 @@
+import threading
+from http import HTTPStatus
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import throttling
+
+
+@override_settings(THROTTLE_RULES={
+    'users:login': {'rate': '2/m', 'scope': 'ip'},
+})
+class ThrottleMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('users:login')
+        self.form_data = {'username': 'nobody', 'password': 'wrong'}
+
+    def test_exhausted_bucket_returns_429(self):
+        """Запрос сверх лимита получает 429 и Retry-After."""
+        for _ in range(2):
+            response = self.client.post(self.url, self.form_data)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        response = self.client.post(self.url, self.form_data)
+        self.assertEqual(
+            response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response['Retry-After'], '30')
+
+    def test_get_is_not_throttled(self):
+        """GET страницы входа не расходует токены."""
+        for _ in range(3):
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_other_ip_has_own_bucket(self):
+        """У каждого IP своё ведро."""
+        for _ in range(3):
+            self.client.post(self.url, self.form_data)
+        response = self.client.post(
+            self.url, self.form_data, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class ThrottleDecoratorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        throttling._local_buckets.clear()
+        self.factory = RequestFactory()
+        self.view = throttling.throttle('1/s', scope='ip')(
+            lambda request: HttpResponse())
+
+    def test_bucket_refills_over_time(self):
+        """Токены восстанавливаются со скоростью rate."""
+        with mock.patch('core.throttling.time.time', return_value=100.0):
+            self.assertEqual(self.view(self.factory.post('/')).status_code,
+                             HTTPStatus.OK)
+            self.assertEqual(self.view(self.factory.post('/')).status_code,
+                             HTTPStatus.TOO_MANY_REQUESTS)
+        with mock.patch('core.throttling.time.time', return_value=101.0):
+            self.assertEqual(self.view(self.factory.post('/')).status_code,
+                             HTTPStatus.OK)
+
+    def test_local_fallback_when_cache_fails(self):
+        """Без кэша ведро хранится в памяти процесса."""
+        with mock.patch('core.throttling.cache.incr', side_effect=OSError):
+            self.assertEqual(self.view(self.factory.post('/')).status_code,
+                             HTTPStatus.OK)
+            self.assertEqual(self.view(self.factory.post('/')).status_code,
+                             HTTPStatus.TOO_MANY_REQUESTS)
+
+    def test_concurrent_requests_share_bucket(self):
+        """Одновременные запросы не получают один и тот же токен."""
+        results = []
+        barrier = threading.Barrier(10)
+
+        def request():
+            barrier.wait()
+            results.append(throttling.take_token('race', 'ip:1', '3/m'))
+
+        threads = [threading.Thread(target=request) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(0), 3)
+
+
+@override_settings(THROTTLE_IP_HEADER='HTTP_X_FORWARDED_FOR')
+class ClientIPTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get_ip(self, forwarded_for):
+        return throttling.get_client_ip(self.factory.post(
+            '/', HTTP_X_FORWARDED_FOR=forwarded_for, REMOTE_ADDR='10.0.0.1'))
+
+    def test_client_cannot_spoof_address(self):
+        """Адрес, который клиент дописал в X-Forwarded-For сам,
+        не считается его адресом.
+        """
+        self.assertEqual(self.get_ip('1.1.1.1, 203.0.113.7'), '203.0.113.7')
+        with override_settings(THROTTLE_PROXY_COUNT=2):
+            self.assertEqual(
+                self.get_ip('1.1.1.1, 203.0.113.7, 10.0.0.5'),
+                '203.0.113.7')
+
+    def test_short_header_falls_back_to_remote_addr(self):
+        with override_settings(THROTTLE_PROXY_COUNT=2):
+            self.assertEqual(self.get_ip('203.0.113.7'), '10.0.0.1')
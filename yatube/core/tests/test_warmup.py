@@ -0,0 +1,50 @@
+import gc
+import os
+import subprocess
+import sys
+import unittest
+
+from django.test import SimpleTestCase
+
+from ..memory import get_children, read_memory
+from ..warmup import prepare_fork, warm_up
+
+HAS_PROC = os.path.exists('/proc/self/status')
+
+
+class WarmUpTests(SimpleTestCase):
+    def test_warm_up(self):
+        """Прогрев проходит по маршрутам всех пространств имён
+        и компилирует шаблоны.
+        """
+        stats = warm_up()
+
+        self.assertGreater(stats['urls'], 20)
+        self.assertGreater(stats['templates'], 20)
+
+    def test_prepare_fork_freezes_objects(self):
+        """Перед fork() объекты переносятся в постоянное поколение."""
+        self.addCleanup(gc.unfreeze)
+
+        count = prepare_fork()
+
+        self.assertGreater(count, 0)
+        self.assertEqual(gc.get_freeze_count(), count)
+
+
+@unittest.skipUnless(HAS_PROC, 'нужна файловая система /proc')
+class MemoryTests(SimpleTestCase):
+    def test_read_memory(self):
+        memory = read_memory()
+
+        self.assertGreater(memory['rss'], 0)
+        if memory['uss'] is not None:
+            self.assertLessEqual(memory['uss'], memory['rss'])
+
+    def test_get_children(self):
+        child = subprocess.Popen(
+            [sys.executable, '-c', 'import time; time.sleep(5)'])
+        self.addCleanup(child.wait)
+        self.addCleanup(child.kill)
+
+        self.assertIn(child.pid, get_children(os.getpid()))
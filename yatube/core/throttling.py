@@ -0,0 +1,123 @@
+import math
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+_lock = threading.Lock()
+_local_buckets = {}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60): ёмкость ведра и период его наполнения."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def get_client_ip(request):
+    """Адрес клиента. За прокси берётся из THROTTLE_IP_HEADER: каждый
+    прокси дописывает в X-Forwarded-For адрес, с которого пришёл запрос,
+    поэтому адрес клиента стоит THROTTLE_PROXY_COUNT-м справа. Всё, что
+    левее, прислал сам клиент, и доверять этому нельзя.
+    """
+    header = settings.THROTTLE_IP_HEADER
+    count = settings.THROTTLE_PROXY_COUNT
+    if header and count and request.META.get(header):
+        addresses = [address.strip()
+                     for address in request.META[header].split(',')]
+        if len(addresses) >= count:
+            return addresses[-count]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def get_ident(request, scope):
+    user = getattr(request, 'user', None)
+    if scope == 'user' and user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{get_client_ip(request)}'
+
+
+def _take_local(key, interval, burst, now):
+    with _lock:
+        tat = max(_local_buckets.get(key, now), now) + interval
+        if tat - now > burst:
+            return tat - burst - now
+        _local_buckets[key] = tat
+        return 0
+
+
+def _take_cached(key, interval, burst, now):
+    # время в кэше хранится в миллисекундах: incr работает с целыми
+    interval, burst, now = (
+        int(value * 1000) for value in (interval, burst, now))
+    cache.add(key, now, None)
+    tat = cache.incr(key, interval)
+    if tat - now > burst:
+        # токен не выдан, возвращаем занятое время
+        cache.decr(key, interval)
+        return (tat - burst - now) / 1000
+    # ключ живёт, пока ведро не наполнится; после этого add() начнёт
+    # его заново. Гонка двух touch() может укоротить срок на один
+    # интервал, то есть выдать клиенту один лишний токен
+    cache.touch(key, max(1, math.ceil((tat - now) / 1000)))
+    return 0
+
+
+def take_token(name, ident, rate):
+    """Проверяет ведро токенов name для клиента ident. Возвращает 0,
+    если токен выдан, иначе число секунд до появления следующего.
+
+    Ведро хранится как GCRA: одно число - время, когда ведро снова
+    станет полным. Токен берётся атомарным incr() этого времени на
+    интервал между токенами, поэтому одновременные запросы из разных
+    процессов не получают один и тот же токен. Если кэш недоступен,
+    используется словарь процесса.
+    """
+    capacity, period = parse_rate(rate)
+    interval = period / capacity
+    key = f'throttle:{name}:{ident}'
+    now = time.time()
+    try:
+        return _take_cached(key, interval, period, now)
+    except Exception:
+        return _take_local(key, interval, period, now)
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.', status=429)
+    response['Retry-After'] = str(math.ceil(retry_after))
+    return response
+
+
+def check_rule(request, name, rule):
+    if request.method not in rule.get('methods', ('POST',)):
+        return None
+    ident = get_ident(request, rule.get('scope', 'user'))
+    retry_after = take_token(name, ident, rule['rate'])
+    if retry_after:
+        return too_many_requests(retry_after)
+    return None
+
+
+def throttle(rate, scope='user', methods=('POST',)):
+    """Декоратор для view, которые не описаны в THROTTLE_RULES."""
+    rule = {'rate': rate, 'scope': scope, 'methods': methods}
+
+    def decorator(view_func):
+        name = f'{view_func.__module__}.{view_func.__qualname__}'
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if settings.THROTTLE_ENABLED:
+                response = check_rule(request, name, rule)
+                if response is not None:
+                    return response
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
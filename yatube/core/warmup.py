@@ -0,0 +1,92 @@
+import gc
+import logging
+import os
+import time
+
+from django.core.cache import caches
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import NoReverseMatch, get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+def warm_resolver(resolver, namespace=''):
+    """Заполняет таблицы reverse() во всех пространствах имён и вызывает
+    reverse() для всех маршрутов без аргументов, чтобы скомпилировать их
+    выражения.
+    Возвращает число таких маршрутов.
+    """
+    count = 0
+    for name in list(resolver.reverse_dict):
+        if not isinstance(name, str):
+            # в reverse_dict лежат и сами view
+            continue
+        try:
+            reverse(f'{namespace}{name}')
+            count += 1
+        except NoReverseMatch:
+            pass
+    for child, (_, sub_resolver) in resolver.namespace_dict.items():
+        count += warm_resolver(sub_resolver, f'{namespace}{child}:')
+    return count
+
+
+def get_template_names(engine):
+    for directory in engine.template_dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith(TEMPLATE_EXTENSIONS):
+                    path = os.path.join(root, filename)
+                    yield os.path.relpath(path, directory)
+
+
+def warm_templates():
+    """Компилирует все шаблоны. Скомпилированные шаблоны хранит
+    cached.Loader, который Django включает при DEBUG = False; при DEBUG
+    прогрев только импортирует библиотеки тегов.
+    """
+    count = 0
+    for engine in engines.all():
+        if not hasattr(engine, 'engine'):
+            # не DjangoTemplates
+            continue
+        for name in set(get_template_names(engine)):
+            try:
+                engine.get_template(name)
+                count += 1
+            except TemplateSyntaxError:
+                logger.warning('Шаблон %s не компилируется', name)
+    return count
+
+
+def warm_up():
+    """Загружает в память всё, что иначе загрузил бы первый запрос
+    каждого рабочего процесса.
+    """
+    start = time.perf_counter()
+    urls = warm_resolver(get_resolver())
+    templates = warm_templates()
+    return {
+        'urls': urls,
+        'templates': templates,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def prepare_fork():
+    """Готовит мастер-процесс к fork().
+
+    Соединения с базой и кэшем не должны достаться рабочим процессам.
+    gc.freeze() переносит все объекты мастера в постоянное поколение:
+    сборщик мусора в рабочих процессах их не обходит и не пишет в их
+    заголовки, поэтому страницы с ними остаются общими (copy-on-write).
+    """
+    connections.close_all()
+    for cache in caches.all():
+        cache.close()
+    gc.collect()
+    gc.freeze()
+    return gc.get_freeze_count()
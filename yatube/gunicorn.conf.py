@@ -0,0 +1,58 @@
+"""
+Настройки gunicorn для рабочего сервера.
+
+Запуск из каталога с manage.py: gunicorn -c gunicorn.conf.py
+
+Django загружается и прогревается в мастер-процессе (preload_app), после
+чего его объекты замораживаются gc.freeze(). Рабочие процессы получают
+их через fork() общими страницами памяти и не копируют, пока не изменят.
+Сколько памяти занимает каждый процесс, показывает
+manage.py worker_memory.
+"""
+import gc
+import multiprocessing
+import os
+
+wsgi_app = 'yatube.wsgi:application'
+bind = os.getenv('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+pidfile = os.getenv('GUNICORN_PIDFILE', '/tmp/yatube-gunicorn.pid')
+preload_app = True
+# перезапуск рабочих процессов после стольких запросов; новые получают
+# память мастера и отдают накопленную
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    from core.warmup import prepare_fork, warm_up
+
+    stats = warm_up()
+    server.log.info(
+        'Прогрев: маршрутов %(urls)s, шаблонов %(templates)s '
+        'за %(seconds).2f с', stats)
+    server.log.info('Заморожено объектов: %s', prepare_fork())
+
+
+def pre_fork(server, worker):
+    # объекты, созданные мастером уже после прогрева
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    from core.memory import read_memory
+
+    memory = read_memory()
+    worker.log.info(
+        'Рабочий процесс %s: rss %.1f МБ, uss %s', worker.pid,
+        memory['rss'] / 2 ** 20,
+        '-' if memory['uss'] is None else f'{memory["uss"] / 2 ** 20:.1f} МБ')
+
+
+def worker_exit(server, worker):
+    # то же делает atexit, но рабочий процесс может завершиться и через
+    # os._exit, минуя его
+    from posts import view_counts
+
+    view_counts.flush()
@@ -1,15 +1,124 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.db.models import Sum
 
-from .models import Post, Group
+from core.paginators import KeysetPaginator
+
+from .jobs import create_job
+from .models import Comment, Group, Post, PostBulkJob, PostDayCount
+
+
+class PostPaginator(KeysetPaginator):
+    # сортировка списка постов в админке по умолчанию
+    keyset_ordering = ('-pub_date', '-pk')
+
+    def estimate_table_size(self, queryset):
+        # точное число постов - сумма счётчиков архива по дням
+        return PostDayCount.objects.aggregate(
+            size=Sum('count'))['size'] or 0
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(), required=False, label='Группа')
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
     list_editable = ('group',)
+    # вместо <select> со всеми группами в каждой строке
+    autocomplete_fields = ('author', 'group')
+    # без COUNT(*) по всей таблице на каждой странице
+    paginator = PostPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+    action_form = PostActionForm
+    actions = (
+        'move_to_group',
+        'clear_group',
+        'delete_in_background',
+        'delete_author_posts',
+    )
+
+    def start_job(self, request, action, queryset, group=None):
+        job = create_job(action, queryset, group)
+        self.message_user(
+            request,
+            f'Задача «{job}» запущена, ход выполнения - '
+            f'в разделе «Массовые операции».',
+            messages.SUCCESS)
+
+    def move_to_group(self, request, queryset):
+        group = Group.objects.filter(
+            pk=request.POST.get('group') or None).first()
+        if group is None:
+            self.message_user(
+                request, 'Выберите группу для переноса.', messages.ERROR)
+            return
+        self.start_job(request, PostBulkJob.MOVE, queryset, group)
+    move_to_group.short_description = 'Перенести в выбранную группу'
+
+    def clear_group(self, request, queryset):
+        self.start_job(request, PostBulkJob.CLEAR_GROUP, queryset)
+    clear_group.short_description = 'Убрать из группы'
+
+    def delete_in_background(self, request, queryset):
+        self.start_job(request, PostBulkJob.DELETE, queryset)
+    delete_in_background.short_description = 'Удалить в фоне'
+
+    def delete_author_posts(self, request, queryset):
+        # подзапрос по выбранным постам пустел бы после удаления
+        # первой пачки, поэтому авторы выбираются сразу
+        authors = list(
+            queryset.order_by().values_list('author_id', flat=True).distinct())
+        self.start_job(
+            request,
+            PostBulkJob.DELETE,
+            Post.objects.filter(author__in=authors))
+    delete_author_posts.short_description = 'Удалить все посты их авторов'
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+
+
+class CommentAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    search_fields = ('text',)
+    raw_id_fields = ('author', 'post')
     empty_value_display = '-пусто-'
 
 
+class PostBulkJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'action', 'group', 'status', 'progress', 'created', 'finished')
+    list_filter = ('status', 'action')
+    exclude = ('selection',)
+    readonly_fields = (
+        'action', 'group', 'status', 'total', 'processed', 'position',
+        'error', 'created', 'finished')
+
+    def progress(self, job):
+        if not job.total:
+            return '-'
+        percent = job.processed * 100 // job.total
+        return f'{job.processed}/{job.total} ({percent}%)'
+    progress.short_description = 'Прогресс'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(PostBulkJob, PostBulkJobAdmin)
+admin.site.register(Comment, CommentAdmin)
@@ -1,5 +1,31 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import archive, comments, feed, live, stats, syndication
+        from .models import Comment, Group, Post, User
+        from .signals import posts_bulk_changed
+
+        post_save.connect(stats.group_saved, sender=Group)
+        post_save.connect(syndication.group_saved, sender=Group)
+        post_save.connect(syndication.user_saved, sender=User)
+        # раньше stats.post_saved, который обновляет _loaded_values
+        post_save.connect(syndication.post_saved, sender=Post)
+        post_save.connect(stats.post_saved, sender=Post)
+        post_save.connect(feed.post_saved, sender=Post)
+        post_save.connect(archive.post_saved, sender=Post)
+        post_save.connect(live.post_saved, sender=Post)
+        post_delete.connect(stats.post_deleted, sender=Post)
+        post_delete.connect(archive.post_deleted, sender=Post)
+        post_delete.connect(syndication.post_deleted, sender=Post)
+        post_save.connect(comments.comment_saved, sender=Comment)
+        post_delete.connect(comments.comment_deleted, sender=Comment)
+        posts_bulk_changed.connect(stats.posts_bulk_changed, sender=Post)
+        posts_bulk_changed.connect(archive.posts_bulk_changed, sender=Post)
+        posts_bulk_changed.connect(
+            syndication.posts_bulk_changed, sender=Post)
+        posts_bulk_changed.connect(comments.posts_bulk_changed, sender=Post)
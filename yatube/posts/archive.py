@@ -0,0 +1,111 @@
+import calendar
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Post, PostDayCount
+from .signals import in_bulk_changes
+
+
+def start_of(day):
+    """Начало дня day в текущем часовом поясе."""
+    value = datetime.datetime.combine(day, datetime.time.min)
+    if settings.USE_TZ:
+        value = timezone.make_aware(value)
+    return value
+
+
+def posts_between(first, last):
+    """Посты с first по last (не включая) - запрос по индексу pub_date."""
+    return Post.objects.filter(
+        pub_date__gte=start_of(first), pub_date__lt=start_of(last))
+
+
+def next_month(first):
+    """Первый день следующего месяца; None, если он позже date.max."""
+    if (first.year, first.month) == (datetime.MAXYEAR, 12):
+        return None
+    return datetime.date(
+        first.year + first.month // 12, first.month % 12 + 1, 1)
+
+
+def refresh_days(days):
+    """Пересчитывает сводку за дни days по постам."""
+    for day in days:
+        count = posts_between(day, day + datetime.timedelta(days=1)).count()
+        if count:
+            PostDayCount.objects.update_or_create(
+                day=day, defaults={'count': count})
+        else:
+            PostDayCount.objects.filter(day=day).delete()
+
+
+def rebuild():
+    """Строит сводку заново по всем постам."""
+    rows = (
+        Post.objects.annotate(day=TruncDate('pub_date'))
+        .order_by().values('day').annotate(count=Count('pk'))
+    )
+    days = [PostDayCount(day=row['day'], count=row['count']) for row in rows]
+    with transaction.atomic():
+        PostDayCount.objects.all().delete()
+        PostDayCount.objects.bulk_create(days)
+    return len(days)
+
+
+def get_day_counts(first, last):
+    return dict(
+        PostDayCount.objects.filter(day__gte=first, day__lt=last)
+        .values_list('day', 'count'))
+
+
+def get_calendar(first, counts):
+    """Недели месяца: списки пар (день, число постов), для дней
+    соседних месяцев число - None.
+    """
+    weeks = calendar.Calendar().monthdatescalendar(first.year, first.month)
+    return [
+        [(day, counts.get(day, 0) if day.month == first.month else None)
+         for day in week]
+        for week in weeks
+    ]
+
+
+def get_neighbours(first, last):
+    """Первые дни ближайших месяцев с постами до и после [first, last)."""
+    previous = (
+        PostDayCount.objects.filter(day__lt=first)
+        .order_by('-day').values_list('day', flat=True).first()
+    )
+    following = (
+        PostDayCount.objects.filter(day__gte=last)
+        .order_by('day').values_list('day', flat=True).first()
+    )
+    return (
+        previous and previous.replace(day=1),
+        following and following.replace(day=1),
+    )
+
+
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if not created or raw or in_bulk_changes():
+        return
+    day = timezone.localdate(instance.pub_date)
+    PostDayCount.objects.get_or_create(day=day)
+    PostDayCount.objects.filter(day=day).update(count=F('count') + 1)
+
+
+def post_deleted(sender, instance, **kwargs):
+    if in_bulk_changes():
+        return
+    day = timezone.localdate(instance.pub_date)
+    PostDayCount.objects.filter(day=day).update(count=F('count') - 1)
+    PostDayCount.objects.filter(day=day, count=0).delete()
+
+
+def posts_bulk_changed(sender, days=(), **kwargs):
+    refresh_days(days)
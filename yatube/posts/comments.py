@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Post
+from .signals import in_bulk_changes
+from .syndication import streams_of, touch
+
+
+def encode_cursor(comment):
+    return f'{comment.created.isoformat()}_{comment.pk}'
+
+
+def get_comments(post, cursor=None, limit=None):
+    """Возвращает страницу комментариев к посту и курсор следующей.
+
+    Комментарии идут от старых к новым; следующая страница выбирается
+    по (created, id) последнего показанного комментария, а не OFFSET.
+    """
+    limit = limit or settings.COMMENTS_PAGE_SIZE
+    comments = Comment.objects.filter(post=post).select_related('author')
+    if cursor is not None:
+        created, comment_id = cursor
+        comments = comments.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=comment_id))
+    comments = list(comments.order_by('created', 'pk')[:limit + 1])
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_cursor = encode_cursor(comments[-1])
+    return comments, next_cursor
+
+
+def touch_post_streams(post_id):
+    # comment_count отдаётся в API, его ответы зависят от отметок лент
+    post = Post.objects.filter(pk=post_id).values(
+        'group_id', 'author_id').first()
+    if post:
+        touch(streams_of({post['group_id']}, {post['author_id']}))
+
+
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1)
+        touch_post_streams(instance.post_id)
+
+
+def comment_deleted(sender, instance, **kwargs):
+    if in_bulk_changes():
+        return
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1)
+    touch_post_streams(instance.post_id)
+
+
+def posts_bulk_changed(sender, post_ids, **kwargs):
+    # комментарии, удалённые в пачке (в том числе каскадом), счётчик не
+    # уменьшали; у удалённых постов считать нечего
+    counts = (
+        Comment.objects.filter(post=OuterRef('pk')).order_by()
+        .values('post').annotate(count=Count('pk')).values('count')
+    )
+    Post.objects.filter(pk__in=post_ids).update(
+        comment_count=Coalesce(Subquery(counts), 0))
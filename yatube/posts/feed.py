@@ -0,0 +1,145 @@
+import heapq
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import FeedEntry, Follow, Post
+
+
+def encode_cursor(post):
+    return f'{post.pub_date.isoformat()}_{post.pk}'
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор страницы; для неверного возвращает None."""
+    try:
+        pub_date, post_id = cursor.rsplit('_', 1)
+        pub_date = parse_datetime(pub_date)
+        post_id = int(post_id)
+    except (AttributeError, ValueError):
+        return None
+    if pub_date is None:
+        return None
+    return pub_date, post_id
+
+
+def is_fanout_author(author_id):
+    followers = Follow.objects.filter(author_id=author_id).count()
+    return followers <= settings.FEED_FANOUT_MAX_FOLLOWERS
+
+
+def fan_out(post):
+    """Кладёт новый пост во входящие подписчиков автора."""
+    if not is_fanout_author(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+         for user_id in follower_ids),
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_ids, author_id):
+    """Добавляет во входящие user_ids последние посты автора."""
+    posts = list(
+        Post.objects.filter(author_id=author_id)
+        .values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_POSTS])
+    FeedEntry.objects.bulk_create(
+        (FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+         for user_id in user_ids for post_id, pub_date in posts),
+        ignore_conflicts=True,
+    )
+
+
+def follow(user, author):
+    _, created = Follow.objects.get_or_create(user=user, author=author)
+    if not created:
+        return
+    followers = Follow.objects.filter(author=author)
+    count = followers.count()
+    if count <= settings.FEED_FANOUT_MAX_FOLLOWERS:
+        backfill([user.pk], author.pk)
+    else:
+        # автор стал популярным только что или был им раньше
+        followers.filter(pull=False).update(pull=True)
+
+
+def unfollow(user, author):
+    deleted, _ = Follow.objects.filter(user=user, author=author).delete()
+    if not deleted:
+        return
+    FeedEntry.objects.filter(user=user, post__author=author).delete()
+    followers = Follow.objects.filter(author=author)
+    if followers.count() == settings.FEED_FANOUT_MAX_FOLLOWERS:
+        # автор перестал быть популярным: его посты теперь читаются
+        # только из входящих, поэтому дополняем их недавними постами
+        followers.update(pull=False)
+        backfill(followers.values_list('user_id', flat=True), author.pk)
+
+
+def after(cursor, date_field, id_field):
+    if cursor is None:
+        return Q()
+    pub_date, post_id = cursor
+    return (
+        Q(**{f'{date_field}__lt': pub_date})
+        | Q(**{date_field: pub_date, f'{id_field}__lt': post_id})
+    )
+
+
+def get_streams(user, cursor, limit):
+    """Отсортированные по убыванию потоки (pub_date, post_id)."""
+    inbox = (
+        FeedEntry.objects.filter(user=user)
+        .filter(after(cursor, 'pub_date', 'post_id'))
+        .order_by('-pub_date', '-post_id')
+        .values_list('pub_date', 'post_id')[:limit]
+    )
+    yield inbox
+    pull_authors = Follow.objects.filter(
+        user=user, pull=True).values_list('author_id', flat=True)
+    for author_id in pull_authors:
+        yield (
+            Post.objects.filter(author_id=author_id)
+            .filter(after(cursor, 'pub_date', 'pk'))
+            .order_by('-pub_date', '-pk')
+            .values_list('pub_date', 'pk')[:limit]
+        )
+
+
+def get_feed(user, cursor=None, limit=None):
+    """Возвращает посты страницы ленты подписок и курсор следующей.
+
+    Посты авторов, у которых не больше FEED_FANOUT_MAX_FOLLOWERS
+    подписчиков, при публикации раскладываются во входящие (FeedEntry)
+    подписчиков, посты популярных авторов читаются из их собственных
+    лент. Все эти потоки уже отсортированы, и страница собирается их
+    слиянием.
+    """
+    limit = limit or settings.FEED_PAGE_SIZE
+    merged = heapq.merge(
+        *get_streams(user, cursor, limit + 1), reverse=True)
+    post_ids = []
+    for _, post_id in merged:
+        # пост популярного автора может лежать и во входящих
+        if post_id not in post_ids:
+            post_ids.append(post_id)
+        if len(post_ids) > limit:
+            break
+    has_next = len(post_ids) > limit
+    posts = (
+        Post.objects.select_related('author', 'group').for_feed()
+        .in_bulk(post_ids[:limit])
+    )
+    page = [posts[post_id] for post_id in post_ids[:limit]
+            if post_id in posts]
+    next_cursor = encode_cursor(page[-1]) if has_next and page else None
+    return page, next_cursor
+
+
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        fan_out(instance)
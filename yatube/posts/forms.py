@@ -1,5 +1,5 @@
 from django import forms
-from .models import Post
+from .models import Comment, Post
 
 
 class PostForm(forms.ModelForm):
@@ -16,3 +16,13 @@ class PostForm(forms.ModelForm):
             'text': 'Напишите сюда текст поста',
             'group': 'Выберите группу для поста',
         }
+
+
+class CommentForm(forms.ModelForm):
+    class Meta:
+        model = Comment
+        fields = ("text",)
+
+        labels = {
+            "text": "Текст комментария",
+        }
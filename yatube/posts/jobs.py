@@ -0,0 +1,148 @@
+import logging
+import pickle
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from .models import Post, PostBulkJob
+from .signals import bulk_changes, posts_bulk_changed
+
+logger = logging.getLogger(__name__)
+
+
+def create_job(action, queryset, group=None):
+    """Создаёт задачу над постами из queryset и запускает её."""
+    job = PostBulkJob.objects.create(
+        action=action,
+        selection=pickle.dumps(queryset.query),
+        group=group,
+    )
+    if settings.POST_JOBS_ASYNC:
+        threading.Thread(
+            target=run_job_in_thread, args=(job.pk,), daemon=True).start()
+    else:
+        run_job(job.pk)
+    return job
+
+
+def get_queryset(job):
+    queryset = Post.objects.all()
+    queryset.query = pickle.loads(job.selection)
+    return queryset.order_by()
+
+
+def apply_batch(job, batch):
+    rows = list(
+        batch.values_list('pk', 'group_id', 'author_id', 'pub_date'))
+    if not rows:
+        return 0
+    post_ids = [row[0] for row in rows]
+    group_ids = {row[1] for row in rows if row[1]}
+    author_ids = {row[2] for row in rows}
+    days = {timezone.localdate(row[3]) for row in rows}
+    posts = Post.objects.filter(pk__in=post_ids)
+    with bulk_changes():
+        if job.action == PostBulkJob.MOVE:
+            posts.update(group=job.group)
+            group_ids.add(job.group_id)
+        elif job.action == PostBulkJob.CLEAR_GROUP:
+            posts.update(group=None)
+        elif job.action == PostBulkJob.DELETE:
+            posts.delete()
+    posts_bulk_changed.send(
+        sender=Post,
+        post_ids=post_ids,
+        group_ids=group_ids,
+        author_ids=author_ids,
+        days=days,
+        deleted=job.action == PostBulkJob.DELETE,
+    )
+    return len(rows)
+
+
+class LeaseLost(Exception):
+    """Задачу забрал другой процесс."""
+
+
+def renew(job, **fields):
+    """Сохраняет fields и продлевает аренду задачи, если с момента
+    чтения job её не забрал другой процесс; иначе LeaseLost.
+    """
+    now = timezone.now()
+    updated = PostBulkJob.objects.filter(
+        pk=job.pk, status=job.status, heartbeat=job.heartbeat,
+    ).update(heartbeat=now, **fields)
+    if not updated:
+        raise LeaseLost
+    job.heartbeat = now
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+
+def claim_job(job_id):
+    """Забирает задачу в очереди или прерванную: выполняемую, которая
+    POST_JOBS_LEASE_SECONDS не сохраняла прогресс. Из нескольких
+    процессов задачу получает один. Возвращает её или None.
+    """
+    job = PostBulkJob.objects.get(pk=job_id)
+    if job.status not in (PostBulkJob.PENDING, PostBulkJob.RUNNING):
+        return None
+    lease = timedelta(seconds=settings.POST_JOBS_LEASE_SECONDS)
+    if job.heartbeat is not None and job.heartbeat > timezone.now() - lease:
+        return None
+    try:
+        renew(job)
+    except LeaseLost:
+        return None
+    return job
+
+
+def run_job(job_id):
+    """Выполняет задачу пачками по POST_JOBS_BATCH_SIZE ключей.
+
+    Каждая пачка - отдельная транзакция, после неё сохраняется
+    прогресс, так что прерванную задачу можно продолжить командой
+    run_post_jobs. Задачу, которую выполняет другой процесс,
+    возвращает как есть.
+    """
+    job = claim_job(job_id)
+    if job is None:
+        return PostBulkJob.objects.get(pk=job_id)
+    queryset = get_queryset(job)
+    batch_size = settings.POST_JOBS_BATCH_SIZE
+    try:
+        if job.status == PostBulkJob.PENDING:
+            stats = queryset.aggregate(total=Count('pk'), low=Min('pk'))
+            renew(job, total=stats['total'], position=stats['low'] or 0,
+                  status=PostBulkJob.RUNNING)
+        high = queryset.aggregate(high=Max('pk'))['high'] or 0
+        while job.position <= high:
+            upper = job.position + batch_size
+            with transaction.atomic():
+                processed = apply_batch(
+                    job,
+                    queryset.filter(pk__gte=job.position, pk__lt=upper))
+                renew(job, processed=job.processed + processed,
+                      position=upper)
+        job.status = PostBulkJob.DONE
+    except LeaseLost:
+        logger.warning('Задачу %s забрал другой процесс', job.pk)
+        return PostBulkJob.objects.get(pk=job_id)
+    except Exception as error:
+        logger.exception('Задача %s упала', job.pk)
+        job.status = PostBulkJob.FAILED
+        job.error = str(error)
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished'])
+    return job
+
+
+def run_job_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        connections.close_all()
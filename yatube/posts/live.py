@@ -0,0 +1,310 @@
+import json
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Max
+
+from .models import Group, Post, User
+
+logger = logging.getLogger(__name__)
+
+# created - время создания поста (timestamp)
+Event = namedtuple('Event', 'post_id group_id author_id created')
+
+# сколько последних событий помнит процесс
+BROKER_SIZE = 1000
+# сколько пропущенных постов досылать переподключившемуся клиенту
+CATCH_UP_LIMIT = 100
+# сколько id недавно полученных постов помнит Cursor
+KNOWN_LIMIT = 100
+# комментарий в SSE раз в HEARTBEAT секунд, чтобы прокси не закрыл
+# соединение; через RETRY_MS браузер переподключается сам
+HEARTBEAT = 15
+RETRY_MS = 3000
+
+
+class Cursor:
+    """Что уже получил клиент: все посты до after_id и посты known.
+
+    Посты коммитятся не в порядке id: пост с меньшим id может появиться
+    позже большего. Поэтому after_id сдвигается только за посты старше
+    LIVE_LATE_SECONDS (все посты до них уже видны), а id полученных
+    постов новее клиент помнит в known. Клиенту курсор передаётся
+    строкой '<after_id>:<id>,<id>' в Last-Event-ID или ?cursor=.
+    """
+    def __init__(self, after_id, known=()):
+        self.after_id = after_id
+        # id -> время создания поста; для пришедших от клиента - сейчас
+        self.known = dict.fromkeys(known, time.time())
+
+    @classmethod
+    def parse(cls, value):
+        """Курсор из строки клиента; для неверной - None."""
+        after, _, known = (value or '').partition(':')
+        after_id = parse_id(after)
+        if after_id is None:
+            return None
+        ids = (parse_id(item) for item in known.split(',')[:KNOWN_LIMIT])
+        return cls(after_id, {post_id for post_id in ids
+                              if post_id and post_id > after_id})
+
+    def __str__(self):
+        return f'{self.after_id}:{",".join(map(str, sorted(self.known)))}'
+
+    def is_new(self, event):
+        return event.post_id > self.after_id and (
+            event.post_id not in self.known)
+
+    def add(self, events):
+        for event in events:
+            if event.post_id > self.after_id:
+                self.known[event.post_id] = event.created
+        settled = time.time() - settings.LIVE_LATE_SECONDS
+        ids = sorted(self.known)
+        for post_id in ids[:-KNOWN_LIMIT]:
+            # known не больше KNOWN_LIMIT, старшие id важнее
+            self.known[post_id] = settled
+        self.after_id = max(
+            [self.after_id] + [post_id for post_id in ids
+                               if self.known[post_id] <= settled])
+        self.known = {post_id: created
+                      for post_id, created in self.known.items()
+                      if post_id > self.after_id}
+
+
+def make_event(row):
+    post_id, group_id, author_id, pub_date = row
+    return Event(post_id, group_id, author_id, pub_date.timestamp())
+
+
+def matches(event, stream):
+    """stream - ('all', None), ('group', id) или ('author', id)."""
+    kind, pk = stream
+    if kind == 'group':
+        return event.group_id == pk
+    if kind == 'author':
+        return event.author_id == pk
+    return True
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class Broker:
+    """Pub/sub новых постов внутри процесса.
+
+    Последние события лежат в памяти; синхронные подписчики (потоки
+    WSGI) ждут на Condition, асинхронные (live_asgi) - на future своего
+    event loop, так что тысячи открытых соединений не занимают потоки.
+    Один пост публикуется один раз: повторы (пост из сигнала и из опроса
+    базы) отсекаются по id, а не по наибольшему id, иначе терялся бы
+    пост, закоммиченный позже поста с большим id. Что отдавать
+    подписчику, решает его Cursor.
+    """
+    def __init__(self, size=BROKER_SIZE):
+        self.events = deque(maxlen=size)
+        self.ids = set()
+        self.condition = threading.Condition()
+        self.waiters = set()
+        self.last_id = 0
+
+    def publish(self, post_id, group_id, author_id, created):
+        with self.condition:
+            if post_id in self.ids:
+                return
+            if len(self.events) == self.events.maxlen:
+                self.ids.discard(self.events[0].post_id)
+            self.ids.add(post_id)
+            self.last_id = max(self.last_id, post_id)
+            self.events.append(Event(post_id, group_id, author_id, created))
+            self.condition.notify_all()
+            waiters, self.waiters = self.waiters, set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    def events_after(self, cursor, stream):
+        return [event for event in self.events
+                if cursor.is_new(event) and matches(event, stream)]
+
+    def wait(self, cursor, stream, timeout):
+        """Новые для cursor события; ждёт их не дольше timeout секунд."""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                events = self.events_after(cursor, stream)
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    return events
+                self.condition.wait(remaining)
+
+    async def wait_async(self, cursor, stream, timeout):
+        # asyncio нужен только ASGI-серверу, WSGI-процессы его не импортируют
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            with self.condition:
+                events = self.events_after(cursor, stream)
+                remaining = deadline - loop.time()
+                if events or remaining <= 0:
+                    return events
+                future = loop.create_future()
+                waiter = (loop, future)
+                self.waiters.add(waiter)
+            try:
+                await asyncio.wait_for(future, remaining)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self.condition:
+                    self.waiters.discard(waiter)
+
+
+broker = Broker()
+
+
+class DatabasePoller:
+    """Заменяет общий брокер, когда посты пишут другие процессы: один
+    поток на процесс раз в LIVE_POLL_INTERVAL секунд выбирает новые
+    посты и публикует их в локальный broker. Какие посты уже видел,
+    поток помнит так же, как клиент, в Cursor.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.cursor = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='live-poller', daemon=True)
+                self.thread.start()
+
+    def poll(self):
+        if self.cursor is None:
+            self.cursor = Cursor(
+                Post.objects.aggregate(last=Max('pk'))['last'] or 0)
+        rows = (
+            Post.objects.filter(pk__gt=self.cursor.after_id)
+            .exclude(pk__in=self.cursor.known).order_by('pk')
+            .values_list('pk', 'group_id', 'author_id', 'pub_date')
+            [:BROKER_SIZE]
+        )
+        events = [make_event(row) for row in rows]
+        for event in events:
+            broker.publish(*event)
+        self.cursor.add(events)
+
+    def run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Сбой опроса новых постов')
+                close_old_connections()
+            time.sleep(settings.LIVE_POLL_INTERVAL)
+
+
+poller = DatabasePoller()
+
+
+def ensure_source():
+    if settings.LIVE_BROKER == 'database':
+        poller.start()
+
+
+def get_stream(params):
+    """Поток по параметрам запроса ?group=<slug> или ?author=<username>.
+    Возвращает None, если группы или автора нет.
+    """
+    if params.get('group'):
+        pk = Group.objects.filter(
+            slug=params['group']).values_list('pk', flat=True).first()
+        return pk and ('group', pk)
+    if params.get('author'):
+        pk = User.objects.filter(
+            username=params['author']).values_list('pk', flat=True).first()
+        return pk and ('author', pk)
+    return ('all', None)
+
+
+def parse_id(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def catch_up(cursor, stream):
+    """Новые для cursor посты из базы: их могло не быть в памяти
+    процесса (клиент долго был отключён или процесс перезапущен).
+    """
+    posts = (
+        Post.objects.filter(pk__gt=cursor.after_id)
+        .exclude(pk__in=cursor.known).order_by('pk')
+    )
+    kind, pk = stream
+    if kind == 'group':
+        posts = posts.filter(group_id=pk)
+    elif kind == 'author':
+        posts = posts.filter(author_id=pk)
+    return [
+        make_event(row) for row in posts.values_list(
+            'pk', 'group_id', 'author_id', 'pub_date')[:CATCH_UP_LIMIT]
+    ]
+
+
+def last_post_id():
+    return broker.last_id or Post.objects.aggregate(
+        last=Max('pk'))['last'] or 0
+
+
+def format_event(event, cursor):
+    # id события - курсор: с ним браузер переподключится
+    data = json.dumps({
+        'id': event.post_id,
+        'group': event.group_id,
+        'author': event.author_id,
+    })
+    return f'id: {cursor}\nevent: post\ndata: {data}\n\n'
+
+
+def format_events(events, cursor):
+    chunks = []
+    for event in events:
+        cursor.add([event])
+        chunks.append(format_event(event, cursor))
+    return ''.join(chunks)
+
+
+def event_stream(cursor, stream, duration):
+    """Тело ответа SSE для WSGI: новые для cursor события в течение
+    duration секунд, затем браузер переподключится с Last-Event-ID.
+    """
+    yield f'retry: {RETRY_MS}\n\n'
+    events = catch_up(cursor, stream)
+    deadline = time.monotonic() + duration
+    while True:
+        if events:
+            yield format_events(events, cursor)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events = broker.wait(cursor, stream, min(HEARTBEAT, remaining))
+        if not events:
+            yield ': ping\n\n'
+
+
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and settings.LIVE_BROKER == 'local':
+        transaction.on_commit(lambda: broker.publish(*make_event((
+            instance.pk, instance.group_id, instance.author_id,
+            instance.pub_date))))
@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.bench import bench_database
+from posts import feed
+from posts.models import Follow, Post, User
+
+POSTS_PER_AUTHOR = 5
+POPULAR_AUTHORS = 3
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает ленту подписок из posts.feed с наивным запросом '
+            'author__in при 10-10000 авторах в подписках.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def timeit(self, func, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat * 1000
+
+    def populate(self, size):
+        reader = User.objects.create_user(username=f'reader{size}')
+        User.objects.bulk_create(
+            User(username=f'a{size}_{i}') for i in range(size))
+        authors = list(User.objects.filter(
+            username__startswith=f'a{size}_').values_list('pk', flat=True))
+        Post.objects.bulk_create(
+            (Post(text='Текст поста', author_id=author_id)
+             for author_id in authors for _ in range(POSTS_PER_AUTHOR)))
+        Follow.objects.bulk_create(
+            (Follow(user=reader, author_id=author_id)
+             for author_id in authors))
+
+        # несколько популярных авторов, чьи посты читаются при показе
+        User.objects.bulk_create(
+            User(username=f'f{size}_{i}')
+            for i in range(settings.FEED_FANOUT_MAX_FOLLOWERS + 1))
+        fans = User.objects.filter(username__startswith=f'f{size}_')
+        for author_id in authors[:POPULAR_AUTHORS]:
+            Follow.objects.bulk_create(
+                Follow(user=fan, author_id=author_id) for fan in fans)
+            Follow.objects.filter(author_id=author_id).update(pull=True)
+
+        for author_id in authors[POPULAR_AUTHORS:]:
+            feed.backfill([reader.pk], author_id)
+        return reader
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        self.stdout.write(
+            f'{"follows":>8}{"naive, ms":>12}{"feed, ms":>12}')
+        with bench_database():
+            for size in options['sizes']:
+                reader = self.populate(size)
+                following = Follow.objects.filter(
+                    user=reader).values('author')
+
+                def naive():
+                    list(Post.objects.select_related('author', 'group')
+                         .filter(author__in=following)
+                         .order_by('-pub_date')[:settings.FEED_PAGE_SIZE])
+
+                def hybrid():
+                    feed.get_feed(reader)
+
+                self.stdout.write(
+                    f'{size:>8}{self.timeit(naive, repeat):>12.2f}'
+                    f'{self.timeit(hybrid, repeat):>12.2f}')
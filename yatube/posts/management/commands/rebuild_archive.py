@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сводку числа постов по дням для архива.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Дней с постами: {rebuild()}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Group
+from posts.stats import refresh_group_stats
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает агрегаты всех групп для каталога групп.'
+
+    def handle(self, *args, **options):
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+        for start in range(0, len(group_ids), BATCH_SIZE):
+            refresh_group_stats(group_ids[start:start + BATCH_SIZE])
+        self.stdout.write(f'Пересчитано групп: {len(group_ids)}')
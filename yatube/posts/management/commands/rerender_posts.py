@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.render import VERSION, rerender
+
+
+class Command(BaseCommand):
+    help = ('Перерендеривает текст постов, сохранённых старой версией '
+            'рендера, например после установки markdown.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = rerender(Post.objects.all(), options['batch_size'])
+        self.stdout.write(f'Перерендерено постов: {total} (версия {VERSION})')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.jobs import run_job
+from posts.models import PostBulkJob
+
+
+class Command(BaseCommand):
+    help = ('Выполняет массовые операции над постами, которые ждут '
+            'в очереди или были прерваны перезапуском. Задачи, которые '
+            'сейчас выполняет другой процесс, пропускаются.')
+
+    def handle(self, *args, **options):
+        jobs = PostBulkJob.objects.filter(
+            status__in=(PostBulkJob.PENDING, PostBulkJob.RUNNING))
+        for job_id in jobs.values_list('pk', flat=True):
+            job = run_job(job_id)
+            self.stdout.write(
+                f'{job}: {job.get_status_display()}, '
+                f'обработано {job.processed} из {job.total}')
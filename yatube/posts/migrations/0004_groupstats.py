@@ -0,0 +1,48 @@
+# Generated by Django 2.2.19 on 2026-10-19 10:38
+
+import json
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+
+
+def build_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    Post = apps.get_model('posts', 'Post')
+    for group in Group.objects.all().iterator():
+        posts = Post.objects.filter(group=group).order_by()
+        totals = posts.aggregate(count=Count('pk'), last=Max('pub_date'))
+        top = (
+            posts.values_list('author__username')
+            .annotate(count=Count('pk'))
+            .order_by('-count', 'author__username')[:3]
+        )
+        GroupStats.objects.create(
+            group=group,
+            post_count=totals['count'],
+            last_post_at=totals['last'],
+            top_authors=json.dumps(
+                [list(row) for row in top], ensure_ascii=False),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_postbulkjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('last_post_at', models.DateTimeField(blank=True, null=True)),
+                ('top_authors', models.TextField(default='[]')),
+            ],
+        ),
+        migrations.RunPython(build_group_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.19 on 2026-10-19 10:45
+
+from html import unescape
+
+from django.db import migrations, models
+from django.utils.html import linebreaks, strip_tags
+from django.utils.text import Truncator
+
+
+def render_posts(apps, schema_editor):
+    # рендер на момент миграции, а не posts.render: абзацы текста без
+    # markdown. Версия остаётся пустой, текущим рендером посты
+    # перерендерит manage.py rerender_posts
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.order_by('pk').only('pk', 'text')
+    position = 0
+    while True:
+        batch = list(posts.filter(pk__gt=position)[:1000])
+        if not batch:
+            return
+        for post in batch:
+            post.text_html = linebreaks(post.text, autoescape=True)
+            post.headline = Truncator(
+                unescape(strip_tags(post.text_html))).chars(30)
+        Post.objects.bulk_update(batch, ['text_html', 'headline'])
+        position = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_comment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='headline',
+            field=models.CharField(blank=True, editable=False, max_length=30),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='render_version',
+            field=models.CharField(blank=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.19 on 2026-10-19 10:46
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def render_excerpts(apps, schema_editor):
+    # рендер на момент миграции, а не posts.render: начало text_html
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.order_by('pk').only('pk', 'text_html')
+    position = 0
+    while True:
+        batch = list(posts.filter(pk__gt=position)[:1000])
+        if not batch:
+            return
+        for post in batch:
+            post.excerpt_html = Truncator(post.text_html).chars(
+                500, html=True)
+        Post.objects.bulk_update(batch, ['excerpt_html'])
+        position = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(render_excerpts, migrations.RunPython.noop),
+    ]
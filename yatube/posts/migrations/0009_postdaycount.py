@@ -0,0 +1,37 @@
+# Generated by Django 2.2.19 on 2026-10-19 10:47
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def build_day_counts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostDayCount = apps.get_model('posts', 'PostDayCount')
+    rows = (
+        Post.objects.annotate(day=TruncDate('pub_date'))
+        .order_by().values('day').annotate(count=Count('pk'))
+    )
+    PostDayCount.objects.bulk_create(
+        PostDayCount(day=row['day'], count=row['count']) for row in rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_excerpt_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostDayCount',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('day',),
+            },
+        ),
+        migrations.RunPython(build_day_counts, migrations.RunPython.noop),
+    ]
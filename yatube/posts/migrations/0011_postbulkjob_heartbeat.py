@@ -0,0 +1,18 @@
+# Generated by Django 2.2.19 on 2026-10-19 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_post_views'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postbulkjob',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
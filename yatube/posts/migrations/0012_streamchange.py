@@ -0,0 +1,20 @@
+# Generated by Django 2.2.19 on 2026-10-19 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_postbulkjob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreamChange',
+            fields=[
+                ('stream', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('changed', models.DateTimeField()),
+            ],
+        ),
+    ]
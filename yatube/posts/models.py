@@ -1,5 +1,11 @@
+import json
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
+
+from . import render
+from .signals import posts_bulk_changed
 
 User = get_user_model()
 
@@ -13,6 +19,71 @@ class Group(models.Model):
         return self.title
 
 
+class PostDayCount(models.Model):
+    """Число постов за день для архива, см. posts.archive."""
+    day = models.DateField(primary_key=True)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.day}: {self.count}'
+
+    class Meta:
+        ordering = ('day',)
+
+
+class StreamChange(models.Model):
+    """Время последнего изменения ленты постов, см. posts.syndication.
+
+    Хранится в базе, а не в кэше, чтобы все рабочие процессы видели
+    одну отметку.
+    """
+    stream = models.CharField(max_length=50, primary_key=True)
+    changed = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.stream}: {self.changed}'
+
+
+class GroupStats(models.Model):
+    """Агрегаты группы для каталога групп, см. posts.stats."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats')
+    post_count = models.PositiveIntegerField(default=0)
+    last_post_at = models.DateTimeField(blank=True, null=True)
+    # JSON-список [[username, число постов], ...] по убыванию
+    top_authors = models.TextField(default='[]')
+
+    def __str__(self):
+        return f'{self.group}: {self.post_count}'
+
+    def get_top_authors(self):
+        return json.loads(self.top_authors)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: полный текст не загружается, шаблон выводит
+        excerpt_html.
+        """
+        return self.defer('text', 'text_html')
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = [render.render_post(post) for post in objs]
+        objs = super().bulk_create(objs, *args, **kwargs)
+        posts_bulk_changed.send(
+            sender=self.model,
+            post_ids=[post.pk for post in objs if post.pk],
+            group_ids={post.group_id for post in objs if post.group_id},
+            author_ids={post.author_id for post in objs},
+            days={timezone.localdate(post.pub_date) for post in objs},
+            deleted=False,
+        )
+        return objs
+
+
 class Post(models.Model):
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True)
@@ -26,9 +97,196 @@ class Post(models.Model):
         blank=True,
         null=True,
         related_name='posts')
+    # число комментариев, чтобы не считать их для каждого поста в ленте
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    # text, отрендеренный при сохранении, см. posts.render
+    text_html = models.TextField(blank=True, editable=False)
+    # начало text_html для лент, где полный текст не загружается
+    excerpt_html = models.TextField(blank=True, editable=False)
+    headline = models.CharField(max_length=30, blank=True, editable=False)
+    render_version = models.CharField(
+        max_length=20, blank=True, editable=False)
+    # просмотры; пишутся пачками, см. posts.view_counts
+    views = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
+    # см. posts.view_counts и posts.comments
+    COUNTER_FIELDS = ('views', 'comment_count')
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if (
+            update_fields is None and not self._state.adding
+            and self.pk is not None and not kwargs.get('force_insert')
+        ):
+            # счётчики меняются через F() в обход экземпляра, и
+            # прочитанное раньше значение не должно их затереть;
+            # отложенные поля (only/defer) Django тоже не сохраняет
+            deferred = self.get_deferred_fields()
+            update_fields = kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.COUNTER_FIELDS
+                and field.attname not in deferred]
+        loaded = getattr(self, '_loaded_values', {})
+        if (
+            (update_fields is None or 'text' in update_fields)
+            and (self.render_version != render.VERSION
+                 or loaded.get('text') != self.text)
+        ):
+            render.render_post(self)
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, *render.RENDERED_FIELDS}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # значения из базы, чтобы при сохранении понять, что изменилось
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['-pub_date'], name='post_pub_date_idx'),
+            models.Index(
+                fields=['group', '-pub_date'], name='post_group_pub_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_pub_date_idx'),
+            models.Index(fields=['-views', '-id'], name='post_views_idx'),
+        ]
+
+
+class PostBulkJob(models.Model):
+    """Массовая операция над постами, которая выполняется пачками."""
+    MOVE = 'move'
+    CLEAR_GROUP = 'clear_group'
+    DELETE = 'delete'
+    ACTIONS = (
+        (MOVE, 'Перенести в группу'),
+        (CLEAR_GROUP, 'Убрать из группы'),
+        (DELETE, 'Удалить'),
+    )
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    action = models.CharField(max_length=20, choices=ACTIONS)
+    # сохранённый через pickle запрос, выбирающий посты
+    selection = models.BinaryField()
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='+')
+    status = models.CharField(
+        max_length=20, choices=STATUSES, default=PENDING)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    # первичный ключ, с которого начнётся следующая пачка
+    position = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(blank=True, null=True)
+    # когда выполняющий задачу процесс последний раз сохранял прогресс
+    heartbeat = models.DateTimeField(blank=True, null=True, editable=False)
+
+    def __str__(self):
+        return f'{self.get_action_display()} #{self.pk}'
+
+    class Meta:
+        ordering = ('-created',)
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following')
+    # у автора больше FEED_FANOUT_MAX_FOLLOWERS подписчиков, и его посты
+    # читаются при показе ленты, а не раскладываются по входящим
+    pull = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='no_self_follow'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'pull'], name='follow_user_pull_idx'),
+        ]
+
+
+class FeedEntry(models.Model):
+    """Пост во входящей ленте подписчика, см. posts.feed."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+')
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+')
+    # копия post.pub_date, чтобы сортировать ленту без JOIN
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_feed_entry'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_user_pub_date_idx'),
+        ]
+
+
+class Comment(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='comments')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='comments')
+    text = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.text[:15]
+
+    class Meta:
+        ordering = ('created', 'pk')
+        indexes = [
+            models.Index(
+                fields=['post', 'created', 'id'],
+                name='comment_post_created_idx'),
+        ]
@@ -0,0 +1,125 @@
+from html import escape, unescape
+from html.parser import HTMLParser
+
+from django.utils.html import linebreaks, strip_tags
+from django.utils.text import Truncator
+
+try:
+    import markdown
+except ImportError:
+    markdown = None
+
+# увеличить, если поменялось то, как рендерится текст;
+# посты со старой версией перерендерит команда rerender_posts
+RENDERER = 2
+VERSION = f'{RENDERER}:{"markdown" if markdown else "plain"}'
+HEADLINE_LENGTH = 30
+# длина текста анонса в ленте, без учёта разметки
+EXCERPT_LENGTH = 500
+RENDERED_FIELDS = ('text_html', 'excerpt_html', 'headline', 'render_version')
+
+ALLOWED_TAGS = {
+    'a', 'blockquote', 'br', 'code', 'em', 'h1', 'h2', 'h3', 'h4', 'h5',
+    'h6', 'hr', 'li', 'ol', 'p', 'pre', 'strong', 'ul',
+}
+EMPTY_TAGS = {'br', 'hr'}
+ALLOWED_ATTRS = {'a': {'href', 'title'}}
+ALLOWED_SCHEMES = ('http:', 'https:', 'mailto:')
+
+
+class Sanitizer(HTMLParser):
+    """Оставляет из HTML только теги ALLOWED_TAGS и безопасные ссылки."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.open_tags = []
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self.skip += 1
+            return
+        if self.skip or tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_ATTRS.get(tag, ())
+        rendered = ''.join(
+            f' {name}="{escape(value)}"' for name, value in attrs
+            if name in allowed and value is not None
+            and (name != 'href' or is_safe_url(value)))
+        self.parts.append(f'<{tag}{rendered}>')
+        if tag not in EMPTY_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self.skip = max(self.skip - 1, 0)
+            return
+        if self.skip or tag not in self.open_tags:
+            return
+        while self.open_tags:
+            opened = self.open_tags.pop()
+            self.parts.append(f'</{opened}>')
+            if opened == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.skip:
+            self.parts.append(escape(data, quote=False))
+
+    def result(self):
+        self.close()
+        closing = ''.join(f'</{tag}>' for tag in reversed(self.open_tags))
+        return ''.join(self.parts) + closing
+
+
+def is_safe_url(url):
+    url = url.strip().lower()
+    return ':' not in url.split('/', 1)[0] or url.startswith(ALLOWED_SCHEMES)
+
+
+def sanitize(html):
+    sanitizer = Sanitizer()
+    sanitizer.feed(html)
+    return sanitizer.result()
+
+
+def render_html(text):
+    """Markdown -> очищенный HTML; без пакета markdown - абзацы текста."""
+    if markdown is None:
+        return linebreaks(text, autoescape=True)
+    return sanitize(markdown.markdown(text, extensions=['extra']))
+
+
+def render_post(post):
+    """Заполняет у поста поля, которые шаблоны выводят вместо text."""
+    post.text_html = render_html(post.text)
+    post.excerpt_html = Truncator(post.text_html).chars(
+        EXCERPT_LENGTH, html=True)
+    post.headline = Truncator(unescape(strip_tags(post.text_html))).chars(
+        HEADLINE_LENGTH)
+    post.render_version = VERSION
+    return post
+
+
+def rerender(queryset, batch_size, stale_only=True):
+    """Перерендеривает посты queryset со старой версией пачками по
+    первичному ключу. Возвращает число обновлённых постов.
+    """
+    if stale_only:
+        queryset = queryset.exclude(render_version=VERSION)
+    queryset = queryset.order_by('pk')
+    # в миграциях у модели могут быть ещё не все поля
+    fields = [
+        field.name for field in queryset.model._meta.concrete_fields
+        if field.name in RENDERED_FIELDS]
+    position = 0
+    total = 0
+    while True:
+        batch = list(
+            queryset.filter(pk__gt=position).only('pk', 'text')[:batch_size])
+        if not batch:
+            return total
+        queryset.model.objects.bulk_update(
+            [render_post(post) for post in batch], fields)
+        position = batch[-1].pk
+        total += len(batch)
@@ -0,0 +1,30 @@
+import threading
+from contextlib import contextmanager
+
+from django.dispatch import Signal
+
+# Отправляется один раз на пачку массовой операции вместо post_save и
+# post_delete на каждый пост: queryset.update() их не шлёт, а delete()
+# шлёт по сигналу на строку. group_ids и author_ids - группы и авторы
+# затронутых постов до и после операции, days - их дни публикации в
+# текущем часовом поясе, deleted - были ли посты удалены.
+posts_bulk_changed = Signal(
+    providing_args=['post_ids', 'group_ids', 'author_ids', 'days', 'deleted'])
+
+_bulk = threading.local()
+
+
+@contextmanager
+def bulk_changes():
+    """Внутри блока построчные обработчики постов ничего не делают,
+    производные данные обновляются по posts_bulk_changed.
+    """
+    _bulk.active = True
+    try:
+        yield
+    finally:
+        _bulk.active = False
+
+
+def in_bulk_changes():
+    return getattr(_bulk, 'active', False)
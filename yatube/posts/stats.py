@@ -0,0 +1,129 @@
+import json
+
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+
+from .models import Group, GroupStats, Post
+from .signals import in_bulk_changes
+
+TOP_AUTHORS = 3
+
+
+def get_top_authors(group_id):
+    rows = (
+        Post.objects.filter(group_id=group_id)
+        .values_list('author__username')
+        .annotate(count=Count('pk'))
+        .order_by('-count', 'author__username')[:TOP_AUTHORS]
+    )
+    return [list(row) for row in rows]
+
+
+def refresh_group_stats(group_ids):
+    """Пересчитывает агрегаты групп group_ids целиком: после массовых
+    операций и в rebuild_group_stats. Одиночные посты учитывают
+    add_post() и remove_post().
+    """
+    group_ids = {group_id for group_id in group_ids if group_id}
+    if not group_ids:
+        return
+    totals = {
+        row['group']: row
+        for row in Post.objects.filter(group__in=group_ids)
+        .order_by().values('group')
+        .annotate(count=Count('pk'), last=Max('pub_date'))
+    }
+    for group_id in Group.objects.filter(
+            pk__in=group_ids).values_list('pk', flat=True):
+        row = totals.get(group_id, {})
+        GroupStats.objects.update_or_create(group_id=group_id, defaults={
+            'post_count': row.get('count', 0),
+            'last_post_at': row.get('last'),
+            'top_authors': json.dumps(
+                get_top_authors(group_id), ensure_ascii=False),
+        })
+
+
+def add_post(group_id, post):
+    """Учитывает пост, появившийся в группе, без пересчёта группы."""
+    GroupStats.objects.get_or_create(group_id=group_id)
+    GroupStats.objects.filter(pk=group_id).update(
+        post_count=F('post_count') + 1)
+    GroupStats.objects.filter(
+        Q(last_post_at__isnull=True) | Q(last_post_at__lt=post.pub_date),
+        pk=group_id,
+    ).update(last_post_at=post.pub_date)
+    update_top_authors(group_id, post, added=True)
+
+
+def remove_post(group_id, post):
+    """Учитывает пост, ушедший из группы, без пересчёта группы."""
+    GroupStats.objects.filter(pk=group_id, post_count__gt=0).update(
+        post_count=F('post_count') - 1)
+    # последний пост группы берётся по индексу (group, -pub_date)
+    GroupStats.objects.filter(
+        pk=group_id, last_post_at__lte=post.pub_date).update(
+        last_post_at=Subquery(
+            Post.objects.filter(group_id=OuterRef('pk'))
+            .order_by('-pub_date').values('pub_date')[:1]))
+    update_top_authors(group_id, post, added=False)
+
+
+def update_top_authors(group_id, post, added):
+    """Обновляет место автора post в top_authors группы.
+
+    Строка группы блокируется до конца транзакции, чтобы одновременные
+    посты не затёрли изменения друг друга. Новый пост может только
+    поднять автора; если пост потерял автор из топа, топ пересчитывается.
+    """
+    username = post.author.username
+    with transaction.atomic():
+        stats = GroupStats.objects.select_for_update().filter(
+            pk=group_id).first()
+        if stats is None:
+            return
+        top = stats.get_top_authors()
+        if added:
+            count = Post.objects.filter(
+                group_id=group_id, author_id=post.author_id).count()
+            top = [row for row in top if row[0] != username]
+            top.append([username, count])
+            top.sort(key=lambda row: (-row[1], row[0]))
+            top = top[:TOP_AUTHORS]
+        elif any(row[0] == username for row in top):
+            top = get_top_authors(group_id)
+        else:
+            return
+        GroupStats.objects.filter(pk=group_id).update(
+            top_authors=json.dumps(top, ensure_ascii=False))
+
+
+def group_saved(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or in_bulk_changes():
+        return
+    if created:
+        if instance.group_id:
+            add_post(instance.group_id, instance)
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    old_group_id = loaded.get('group_id', instance.group_id)
+    if old_group_id != instance.group_id:
+        if old_group_id:
+            remove_post(old_group_id, instance)
+        if instance.group_id:
+            add_post(instance.group_id, instance)
+        instance._loaded_values['group_id'] = instance.group_id
+
+
+def post_deleted(sender, instance, **kwargs):
+    if instance.group_id and not in_bulk_changes():
+        remove_post(instance.group_id, instance)
+
+
+def posts_bulk_changed(sender, group_ids, **kwargs):
+    refresh_group_stats(group_ids)
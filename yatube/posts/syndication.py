@@ -0,0 +1,230 @@
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, quote_etag
+
+from core.compression import compress_cached
+
+from .models import Group, Post, StreamChange, User
+from .signals import in_bulk_changes
+
+ITEMS_COUNT = 20
+BODY_KEY = 'syndication:body:{}:{}:{}'
+BODY_TIMEOUT = 60 * 60 * 24
+
+
+def streams_of(group_ids, author_ids):
+    return (
+        ['all']
+        + [f'group:{group_id}' for group_id in group_ids if group_id]
+        + [f'author:{author_id}' for author_id in author_ids]
+    )
+
+
+def touch(streams):
+    """Отмечает, что в лентах streams что-то изменилось."""
+    now = timezone.now()
+    StreamChange.objects.bulk_create(
+        [StreamChange(stream=stream, changed=now) for stream in streams],
+        ignore_conflicts=True)
+    StreamChange.objects.filter(stream__in=streams).update(changed=now)
+
+
+def get_marker(stream):
+    """Время последнего изменения ленты или None, если отметки нет.
+
+    Отметка читается из той же базы, что и посты запроса: отставшая
+    реплика отдаёт и старую отметку, а не новую со старыми постами.
+    """
+    return StreamChange.objects.filter(stream=stream).values_list(
+        'changed', flat=True).first()
+
+
+def changed_at(stream):
+    """Время последнего изменения ленты; у ленты без отметки она
+    ставится сейчас.
+    """
+    changed = get_marker(stream)
+    if changed is None:
+        changed = StreamChange.objects.get_or_create(
+            stream=stream, defaults={'changed': timezone.now()})[0].changed
+    return changed
+
+
+def cached_response(request, stream, variant, build, content_type):
+    """Ответ с содержимым, которое зависит только от постов stream.
+
+    build() вызывается, только если в кэше нет готового тела для
+    текущей отметки изменения stream, сжатое тело тоже берётся из
+    кэша; при совпадении ETag или Last-Modified отдаётся 304.
+    """
+    changed = changed_at(stream).timestamp()
+    etag = quote_etag(f'{stream}:{variant}:{changed}')
+    last_modified = int(changed)
+    key = BODY_KEY.format(stream, variant, changed)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified)
+    if response is None:
+        body = cache.get(key)
+        if body is None:
+            body = build()
+            cache.set(key, body, BODY_TIMEOUT)
+        response = HttpResponse(body, content_type=content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return compress_cached(request, response, key, BODY_TIMEOUT)
+
+
+class LatestPostsFeed(Feed):
+    """RSS последних постов.
+
+    Готовый XML ленты хранится в кэше под ключом с отметкой времени
+    последнего изменения её постов; эта же отметка отдаётся в ETag и
+    Last-Modified, так что повторный опрос без изменений получает 304
+    без обращения к постам.
+    """
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def __call__(self, request, *args, **kwargs):
+        try:
+            obj = self.get_object(request, *args, **kwargs)
+        except ObjectDoesNotExist:
+            raise Http404('Feed object does not exist.')
+        return cached_response(
+            request,
+            self.stream(obj),
+            self.feed_type.__name__,
+            lambda: self.get_feed(obj, request).writeString('utf-8'),
+            self.feed_type.content_type,
+        )
+
+    def stream(self, obj):
+        return 'all'
+
+    def link(self, obj):
+        return reverse('posts:index')
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return (
+            self.get_posts(obj).select_related('author', 'group')
+            .for_feed()[:ITEMS_COUNT]
+        )
+
+    def item_title(self, item):
+        return item.headline
+
+    def item_description(self, item):
+        return item.excerpt_html
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def stream(self, obj):
+        return f'group:{obj.pk}'
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', args=(obj.slug,))
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def stream(self, obj):
+        return f'author:{obj.pk}'
+
+    def title(self, obj):
+        return f'Yatube: {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=(obj.username,))
+
+    def get_posts(self, obj):
+        return obj.posts.all()
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self.description(obj)
+
+
+def group_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        touch([f'group:{instance.pk}'])
+
+
+def user_saved(sender, instance, created, raw=False, update_fields=None,
+               **kwargs):
+    # имя автора есть в его лентах и в лентах с его постами; у нового
+    # пользователя постов нет, а вход меняет только last_login
+    if raw or created or update_fields == {'last_login'}:
+        return
+    group_ids = set(
+        instance.posts.order_by().values_list('group_id', flat=True)
+        .distinct())
+    touch(streams_of(group_ids, {instance.pk}))
+
+
+def post_saved(sender, instance, raw=False, **kwargs):
+    if raw or in_bulk_changes():
+        return
+    # до stats.post_saved, пока _loaded_values хранит прежнюю группу
+    loaded = getattr(instance, '_loaded_values', {})
+    touch(streams_of(
+        {instance.group_id, loaded.get('group_id')}, {instance.author_id}))
+
+
+def post_deleted(sender, instance, **kwargs):
+    if not in_bulk_changes():
+        touch(streams_of({instance.group_id}, {instance.author_id}))
+
+
+def posts_bulk_changed(sender, group_ids, author_ids, **kwargs):
+    touch(streams_of(group_ids, author_ids))
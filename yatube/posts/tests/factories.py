@@ -0,0 +1,42 @@
+from django.contrib.auth.hashers import make_password
+
+from ..models import Group, Post, User
+
+# один хеш на все создаваемые пачкой учётные записи
+PASSWORD = 'pass'
+_password_hash = None
+
+
+def password_hash():
+    global _password_hash
+    if _password_hash is None:
+        _password_hash = make_password(PASSWORD)
+    return _password_hash
+
+
+def _created(model, objs):
+    """SQLite не возвращает pk из bulk_create, поэтому только что
+    созданные строки перечитываются по pk больше прежнего максимума.
+    """
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    model.objects.bulk_create(objs)
+    return list(model.objects.filter(pk__gt=last or 0).order_by('pk'))
+
+
+def make_users(count, prefix='user'):
+    return _created(User, [
+        User(username=f'{prefix}{i}', password=password_hash())
+        for i in range(count)])
+
+
+def make_groups(count, prefix='group'):
+    return _created(Group, [
+        Group(title=f'Группа {i}', slug=f'{prefix}-{i}', description='-')
+        for i in range(count)])
+
+
+def make_posts(count, author, group=None, text='Пост {}'):
+    """Создаёт count постов одним запросом, со всеми сигналами пачки."""
+    return _created(Post, [
+        Post(text=text.format(i), author=author, group=group)
+        for i in range(count)])
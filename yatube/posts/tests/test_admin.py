@@ -0,0 +1,89 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.paginators import EstimatedCountPaginator
+
+from ..admin import PostPaginator
+from ..models import Group, Post, User
+from .factories import make_posts
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@yatube.ru', password='pass')
+        cls.group = Group.objects.create(
+            title='Группа админки',
+            slug='admin-group',
+            description='Группа для админки'
+        )
+        make_posts(25, author=cls.admin, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        self.admin_client = Client()
+        self.admin_client.force_login(PostAdminTests.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def get_sql(self, *args, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get(*args, **kwargs)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response, ' '.join(q['sql'] for q in queries)
+
+    def test_changelist_skips_full_count(self):
+        """Список постов не считает COUNT(*) по всей таблице."""
+        response, sql = self.get_sql(self.url)
+        self.assertNotIn('COUNT(', sql)
+        self.assertIsInstance(response.context['cl'].paginator, PostPaginator)
+
+    def test_group_column_uses_autocomplete(self):
+        """Группа в списке редактируется через autocomplete,
+           а не через <select> со всеми группами.
+        """
+        response = self.admin_client.get(self.url)
+        self.assertContains(response, 'admin-autocomplete')
+
+    def test_next_page_uses_keyset(self):
+        """Следующая страница выбирается по ключу, без OFFSET."""
+        per_page = 10
+        posts = Post.objects.order_by('-pub_date', '-pk')
+        paginator = PostPaginator(posts, per_page)
+        first = list(paginator.page(1).object_list)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = list(PostPaginator(posts, per_page).page(2).object_list)
+
+        self.assertNotIn('OFFSET', queries[-1]['sql'])
+        self.assertEqual(
+            [post.pk for post in first + second],
+            list(posts.values_list('pk', flat=True)[:2 * per_page]))
+
+    def test_filtered_count_is_capped(self):
+        """Отфильтрованный список считается не дальше порога."""
+        paginator = PostPaginator(
+            Post.objects.filter(group=PostAdminTests.group), 10)
+        paginator.count_cap = 20
+        self.assertEqual(paginator.count, 20)
+
+    def test_count_after_deletes(self):
+        """После удаления постов число страниц не завышено."""
+        Post.objects.filter(
+            pk__in=Post.objects.order_by('pk').values('pk')[:5]).delete()
+        count = Post.objects.count()
+
+        self.assertEqual(PostPaginator(Post.objects.all(), 10).count, count)
+        self.assertEqual(
+            EstimatedCountPaginator(Post.objects.all(), 10).count, count)
+
+    def test_changelist_has_no_date_hierarchy(self):
+        """Список постов не выбирает годы и месяцы всех постов."""
+        _, sql = self.get_sql(self.url)
+        self.assertNotIn('DISTINCT', sql)
@@ -0,0 +1,124 @@
+import datetime
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive
+from ..jobs import create_job
+from ..models import Post, PostBulkJob, PostDayCount, User
+
+
+def day_counts():
+    return dict(PostDayCount.objects.values_list('day', 'count'))
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='archivist')
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.today = timezone.localdate()
+
+    def create_post(self, day, text='Пост'):
+        post = Post.objects.create(text=text, author=ArchiveTests.user)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=archive.start_of(day) + datetime.timedelta(hours=12))
+        archive.rebuild()
+        return post
+
+    def test_counts_follow_writes(self):
+        """Сводка обновляется при создании и удалении постов."""
+        post = Post.objects.create(text='Пост', author=ArchiveTests.user)
+        Post.objects.create(text='Ещё пост', author=ArchiveTests.user)
+        self.assertEqual(day_counts(), {self.today: 2})
+
+        post.delete()
+        self.assertEqual(day_counts(), {self.today: 1})
+
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=ArchiveTests.user)
+            for i in range(3))
+        self.assertEqual(day_counts(), {self.today: 4})
+
+        create_job(PostBulkJob.DELETE, Post.objects.all())
+        self.assertEqual(day_counts(), {})
+
+    def test_month_page(self):
+        """Страница месяца показывает его посты, календарь и соседей."""
+        self.create_post(datetime.date(2020, 1, 15), 'Январский пост')
+        self.create_post(datetime.date(2020, 3, 2), 'Мартовский пост')
+        self.create_post(datetime.date(2020, 3, 20), 'Ещё мартовский')
+        self.create_post(datetime.date(2020, 5, 1), 'Майский пост')
+
+        response = self.guest_client.get(
+            reverse('posts:archive_month', args=(2020, 3)))
+
+        texts = [post.excerpt_html for post in response.context['page_obj']]
+        self.assertEqual(len(texts), 2)
+        self.assertIn('Ещё мартовский', texts[0])
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+        self.assertEqual(
+            response.context['previous_month'], datetime.date(2020, 1, 1))
+        self.assertEqual(
+            response.context['next_month'], datetime.date(2020, 5, 1))
+        days = dict(
+            pair for week in response.context['calendar'] for pair in week
+            if pair[1] is not None)
+        self.assertEqual(days[datetime.date(2020, 3, 2)], 1)
+        self.assertEqual(days[datetime.date(2020, 3, 3)], 0)
+
+    def test_day_page(self):
+        """Страница дня показывает только посты этого дня."""
+        self.create_post(datetime.date(2020, 3, 2), 'Второе марта')
+        self.create_post(datetime.date(2020, 3, 3), 'Третье марта')
+
+        response = self.guest_client.get(
+            reverse('posts:archive_day', args=(2020, 3, 2)))
+
+        self.assertContains(response, 'Второе марта')
+        self.assertNotContains(response, 'Третье марта')
+
+    def test_invalid_date(self):
+        """Несуществующая дата - 404."""
+        response = self.guest_client.get(
+            reverse('posts:archive_day', args=(2020, 2, 30)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_last_month(self):
+        """Последний месяц календаря не ломает вычисление следующего."""
+        self.assertEqual(archive.next_month(datetime.date(2020, 12, 1)),
+                         datetime.date(2021, 1, 1))
+        self.assertIsNone(archive.next_month(datetime.date(9999, 12, 1)))
+        urls = (
+            reverse('posts:archive_month', args=(9999, 12)),
+            reverse('posts:archive_day', args=(9999, 12, 31)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.guest_client.get(url).status_code, 404)
+        response = self.guest_client.get(
+            reverse('posts:archive_month', args=(9999, 11)))
+        self.assertEqual(response.status_code, 200)
+
+    def test_index_redirects_to_latest_month(self):
+        """/archive/ ведёт на последний месяц с постами."""
+        self.create_post(datetime.date(2019, 7, 4))
+        response = self.guest_client.get(reverse('posts:archive_index'))
+        self.assertRedirects(
+            response, reverse('posts:archive_month', args=(2019, 7)))
+
+    def test_rebuild_command(self):
+        """rebuild_archive восстанавливает сводку."""
+        Post.objects.create(text='Пост', author=ArchiveTests.user)
+        PostDayCount.objects.all().delete()
+
+        call_command('rebuild_archive', stdout=StringIO())
+
+        self.assertEqual(day_counts(), {self.today: 1})
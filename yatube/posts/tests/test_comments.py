@@ -0,0 +1,110 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post, User
+from ..signals import bulk_changes, posts_bulk_changed
+
+
+class CommentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='commentator')
+        cls.post = Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(CommentTests.user)
+        self.url = reverse(
+            'posts:add_comment', kwargs={'post_id': CommentTests.post.pk})
+
+    def test_authorized_user_can_comment(self):
+        """Комментарий сохраняется и учитывается в счётчике поста."""
+        response = self.authorized_client.post(
+            self.url, {'text': 'Комментарий'}, follow=True)
+
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertContains(response, 'Комментарий')
+        CommentTests.post.refresh_from_db()
+        self.assertEqual(CommentTests.post.comment_count, 1)
+
+    def test_guest_cannot_comment(self):
+        """Гость перенаправляется на страницу входа."""
+        response = self.guest_client.post(self.url, {'text': 'Комментарий'})
+
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertRedirects(
+            response, f'{reverse("users:login")}?next={self.url}')
+
+    def test_delete_decrements_count(self):
+        """Удаление комментария уменьшает счётчик."""
+        comment = Comment.objects.create(
+            post=CommentTests.post, author=CommentTests.user, text='Текст')
+        comment.delete()
+
+        CommentTests.post.refresh_from_db()
+        self.assertEqual(CommentTests.post.comment_count, 0)
+
+    def test_bulk_delete_recounts_once(self):
+        """В массовой операции комментарии не обновляют пост по одному,
+        счётчик пересчитывается один раз на пачку.
+        """
+        post = CommentTests.post
+        Comment.objects.bulk_create(
+            Comment(post=post, author=CommentTests.user, text=str(i))
+            for i in range(3))
+        Post.objects.filter(pk=post.pk).update(comment_count=3)
+
+        with CaptureQueriesContext(connection) as queries:
+            with bulk_changes():
+                Comment.objects.filter(post=post).delete()
+        posts_bulk_changed.send(
+            sender=Post, post_ids=[post.pk], group_ids=set(),
+            author_ids={post.author_id}, days=set(), deleted=False)
+
+        self.assertFalse(
+            [q for q in queries if q['sql'].startswith('UPDATE')])
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 0)
+
+    @override_settings(COMMENTS_PAGE_SIZE=3)
+    def test_comment_pages_do_not_overlap(self):
+        """Страницы комментариев по курсору идут подряд без повторов."""
+        for i in range(5):
+            Comment.objects.create(
+                post=CommentTests.post, author=CommentTests.user,
+                text=f'Комментарий {i}')
+
+        response = self.guest_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': CommentTests.post.pk}))
+        first = response.context['comments']
+        cursor = response.context['next_cursor']
+        response = self.guest_client.get(
+            reverse('posts:post_detail',
+                    kwargs={'post_id': CommentTests.post.pk}),
+            {'after': cursor})
+        second = response.context['comments']
+
+        self.assertEqual(len(first), 3)
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertEqual(
+            first + second, list(Comment.objects.order_by('created', 'pk')))
+
+    def test_comments_do_not_add_queries_to_index(self):
+        """Счётчик комментариев в ленте не требует запросов на пост."""
+        def count_queries():
+            with CaptureQueriesContext(connection) as context:
+                self.guest_client.get(reverse('posts:index'))
+            return len(context)
+
+        before = count_queries()
+        for i in range(5):
+            post = Post.objects.create(
+                text=f'Пост {i}', author=CommentTests.user)
+            Comment.objects.create(
+                post=post, author=CommentTests.user, text='Текст')
+
+        self.assertEqual(count_queries(), before)
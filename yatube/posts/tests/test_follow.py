@@ -0,0 +1,114 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import feed
+from ..models import FeedEntry, Follow, Post, User
+
+
+class FollowViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='follower')
+        cls.author = User.objects.create_user(username='followed')
+        cls.stranger = User.objects.create_user(username='stranger')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(FollowViewTests.user)
+
+    def follow(self, username):
+        return self.authorized_client.get(
+            reverse('posts:profile_follow', kwargs={'username': username}))
+
+    def test_follow_and_unfollow(self):
+        """Пользователь может подписаться на автора и отписаться."""
+        self.follow(FollowViewTests.author.username)
+        self.assertTrue(Follow.objects.filter(
+            user=FollowViewTests.user, author=FollowViewTests.author
+        ).exists())
+
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': FollowViewTests.author.username}))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_cannot_follow_self(self):
+        """Подписаться на самого себя нельзя."""
+        self.follow(FollowViewTests.user.username)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_new_post_appears_only_for_followers(self):
+        """Новый пост появляется в ленте подписчика
+           и не появляется у остальных.
+        """
+        self.follow(FollowViewTests.author.username)
+        post = Post.objects.create(
+            text='Пост для подписчиков', author=FollowViewTests.author)
+
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertIn(post, response.context['posts'])
+
+        stranger_client = Client()
+        stranger_client.force_login(FollowViewTests.stranger)
+        response = stranger_client.get(reverse('posts:follow_index'))
+        self.assertNotIn(post, response.context['posts'])
+
+
+@override_settings(FEED_FANOUT_MAX_FOLLOWERS=1, FEED_PAGE_SIZE=10)
+class HybridFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.fan = User.objects.create_user(username='fan')
+        cls.author = User.objects.create_user(username='regular_author')
+        cls.star = User.objects.create_user(username='star_author')
+
+    def setUp(self):
+        feed.follow(HybridFeedTests.reader, HybridFeedTests.author)
+        feed.follow(HybridFeedTests.reader, HybridFeedTests.star)
+        feed.follow(HybridFeedTests.fan, HybridFeedTests.star)
+
+    def test_popular_author_is_read_on_demand(self):
+        """Посты популярного автора не раскладываются по входящим,
+           но попадают в ленту в общем порядке.
+        """
+        self.assertTrue(Follow.objects.get(
+            user=HybridFeedTests.reader, author=HybridFeedTests.star).pull)
+        posts = []
+        for i in range(6):
+            author = (HybridFeedTests.author, HybridFeedTests.star)[i % 2]
+            posts.append(Post.objects.create(text=f'Пост {i}', author=author))
+
+        self.assertFalse(FeedEntry.objects.filter(
+            post__author=HybridFeedTests.star).exists())
+        page, next_cursor = feed.get_feed(HybridFeedTests.reader)
+        self.assertEqual(page, posts[::-1])
+        self.assertIsNone(next_cursor)
+
+    def test_cursor_pages_do_not_overlap(self):
+        """Страницы по курсору идут подряд без повторов."""
+        for i in range(15):
+            author = (HybridFeedTests.author, HybridFeedTests.star)[i % 2]
+            Post.objects.create(text=f'Пост {i}', author=author)
+
+        first, cursor = feed.get_feed(HybridFeedTests.reader)
+        second, last_cursor = feed.get_feed(
+            HybridFeedTests.reader, feed.decode_cursor(cursor))
+
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(second), 5)
+        self.assertIsNone(last_cursor)
+        self.assertEqual(
+            first + second, list(Post.objects.order_by('-pub_date', '-pk')))
+
+    def test_unfollow_popular_author_backfills_inbox(self):
+        """Автор, переставший быть популярным, попадает во входящие."""
+        post = Post.objects.create(text='Пост', author=HybridFeedTests.star)
+        feed.unfollow(HybridFeedTests.fan, HybridFeedTests.star)
+
+        self.assertFalse(Follow.objects.get(
+            user=HybridFeedTests.reader, author=HybridFeedTests.star).pull)
+        self.assertTrue(FeedEntry.objects.filter(
+            user=HybridFeedTests.reader, post=post).exists())
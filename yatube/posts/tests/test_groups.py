@@ -0,0 +1,144 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, GroupStats, Post, User
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='stats_author')
+        cls.other = User.objects.create_user(username='stats_other')
+        cls.group = Group.objects.create(
+            title='Группа со статистикой', slug='stats', description='-')
+        cls.second_group = Group.objects.create(
+            title='Вторая группа', slug='stats-2', description='-')
+
+    def get_stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_new_posts_update_stats(self):
+        """Новые посты увеличивают счётчики группы."""
+        Post.objects.create(
+            text='Первый', author=GroupStatsTests.author,
+            group=GroupStatsTests.group)
+        last = Post.objects.create(
+            text='Второй', author=GroupStatsTests.author,
+            group=GroupStatsTests.group)
+        Post.objects.create(
+            text='Третий', author=GroupStatsTests.other,
+            group=GroupStatsTests.group)
+
+        stats = self.get_stats(GroupStatsTests.group)
+        self.assertEqual(stats.post_count, 3)
+        self.assertGreaterEqual(stats.last_post_at, last.pub_date)
+        self.assertEqual(
+            stats.get_top_authors(),
+            [['stats_author', 2], ['stats_other', 1]])
+
+    def test_moved_and_deleted_posts_update_stats(self):
+        """Перенос и удаление поста пересчитывают обе группы."""
+        Post.objects.create(
+            text='Пост', author=GroupStatsTests.author,
+            group=GroupStatsTests.group)
+        post = Post.objects.get()
+        post.group = GroupStatsTests.second_group
+        post.save()
+
+        self.assertEqual(self.get_stats(GroupStatsTests.group).post_count, 0)
+        self.assertEqual(
+            self.get_stats(GroupStatsTests.second_group).post_count, 1)
+
+        post.delete()
+        self.assertEqual(
+            self.get_stats(GroupStatsTests.second_group).post_count, 0)
+
+    def test_delete_updates_last_post_and_top(self):
+        """Удаление последнего поста возвращает дату предыдущего и
+        убирает автора из топа.
+        """
+        first = Post.objects.create(
+            text='Первый', author=GroupStatsTests.author,
+            group=GroupStatsTests.group)
+        last = Post.objects.create(
+            text='Второй', author=GroupStatsTests.other,
+            group=GroupStatsTests.group)
+
+        last.delete()
+
+        stats = self.get_stats(GroupStatsTests.group)
+        self.assertEqual(stats.post_count, 1)
+        self.assertEqual(stats.last_post_at, first.pub_date)
+        self.assertEqual(stats.get_top_authors(), [['stats_author', 1]])
+
+    def test_single_post_does_not_recount_group(self):
+        """Новый пост и пост не из топа меняют счётчики без пересчёта
+        всех постов группы.
+        """
+        post = Post.objects.create(
+            text='Пост', author=GroupStatsTests.other,
+            group=GroupStatsTests.group)
+        GroupStats.objects.filter(pk=GroupStatsTests.group.pk).update(
+            top_authors='[["другой", 5]]')
+
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(
+                text='Ещё пост', author=GroupStatsTests.author,
+                group=GroupStatsTests.group)
+            post.delete()
+
+        self.assertFalse(
+            [q for q in queries if 'GROUP BY' in q['sql']])
+        self.assertEqual(self.get_stats(GroupStatsTests.group).post_count, 1)
+
+    def test_bulk_create_updates_stats(self):
+        """bulk_create пересчитывает группу один раз."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=GroupStatsTests.author,
+                 group=GroupStatsTests.group) for i in range(5))
+        self.assertEqual(self.get_stats(GroupStatsTests.group).post_count, 5)
+
+
+class GroupIndexViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='index_author')
+        for i in range(15):
+            group = Group.objects.create(
+                title=f'Группа {i}', slug=f'group-{i:02}', description='-')
+            Post.objects.create(text='Пост', author=author, group=group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_query_count_does_not_depend_on_groups(self):
+        """Страница групп - один запрос за страницей и один за их числом,
+           при повторном показе группы берутся из кэша.
+        """
+        url = reverse('posts:group_index')
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertContains(response, 'index_author')
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_page_is_rendered_for_each_user(self):
+        """В кэше только группы: шапка вошедшего пользователя
+           не достаётся другим.
+        """
+        url = reverse('posts:group_index')
+        user = User.objects.create_user(username='index_viewer')
+        client = Client()
+        client.force_login(user)
+        self.assertContains(client.get(url), 'index_viewer')
+
+        response = self.client.get(url)
+        self.assertNotContains(response, 'index_viewer')
+        self.assertEqual(len(response.context['page_obj']), 10)
@@ -0,0 +1,130 @@
+import pickle
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post, PostBulkJob, User
+from .factories import make_posts
+from ..signals import posts_bulk_changed
+
+
+@override_settings(POST_JOBS_BATCH_SIZE=5)
+class PostBulkJobTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='jobs_admin', email='jobs@yatube.ru', password='pass')
+        cls.author = User.objects.create_user(username='jobs_author')
+        cls.group = Group.objects.create(
+            title='Исходная группа', slug='jobs-source', description='-')
+        cls.target = Group.objects.create(
+            title='Новая группа', slug='jobs-target', description='-')
+        make_posts(12, author=cls.author, group=cls.group)
+        cls.other_post = Post.objects.create(
+            text='Чужой пост', author=cls.admin, group=cls.group)
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(PostBulkJobTests.admin)
+        self.batches = []
+        posts_bulk_changed.connect(self.on_batch, dispatch_uid='test_jobs')
+        self.addCleanup(posts_bulk_changed.disconnect,
+                        dispatch_uid='test_jobs')
+
+    def on_batch(self, sender, **kwargs):
+        self.batches.append(kwargs)
+
+    def run_action(self, action, posts, **data):
+        return self.admin_client.post(
+            reverse('admin:posts_post_changelist'), {
+                'action': action,
+                '_selected_action': [post.pk for post in posts],
+                **data,
+            })
+
+    def test_move_to_group_runs_in_batches(self):
+        """Перенос в группу идёт пачками с одним сигналом на пачку."""
+        posts = PostBulkJobTests.author.posts.all()
+        self.run_action(
+            'move_to_group', posts, group=PostBulkJobTests.target.pk)
+
+        job = PostBulkJob.objects.get()
+        self.assertEqual(job.status, PostBulkJob.DONE)
+        self.assertEqual((job.processed, job.total), (12, 12))
+        self.assertEqual(PostBulkJobTests.target.posts.count(), 12)
+        self.assertEqual(len(self.batches), 3)
+        self.assertIn(PostBulkJobTests.group.pk, self.batches[0]['group_ids'])
+
+    def test_move_without_group_is_rejected(self):
+        """Без выбранной группы задача не создаётся."""
+        self.run_action('move_to_group', [PostBulkJobTests.other_post])
+        self.assertFalse(PostBulkJob.objects.exists())
+
+    def test_delete_author_posts(self):
+        """Удаляются все посты авторов выбранных постов, даже если
+        выбранный пост удаляется первой пачкой.
+        """
+        post = PostBulkJobTests.author.posts.order_by('pk').first()
+        self.run_action('delete_author_posts', [post])
+
+        job = PostBulkJob.objects.get()
+        self.assertEqual((job.processed, job.total), (12, 12))
+        self.assertFalse(PostBulkJobTests.author.posts.exists())
+        self.assertTrue(
+            Post.objects.filter(pk=PostBulkJobTests.other_post.pk).exists())
+        self.assertTrue(all(batch['deleted'] for batch in self.batches))
+
+    def test_interrupted_job_is_resumed(self):
+        """run_post_jobs продолжает задачу с сохранённой позиции."""
+        posts = Post.objects.order_by('pk')
+        resume_from = posts[6].pk
+        job = PostBulkJob.objects.create(
+            action=PostBulkJob.CLEAR_GROUP,
+            selection=pickle.dumps(posts.query),
+            status=PostBulkJob.RUNNING,
+            total=posts.count(),
+            processed=6,
+            position=resume_from,
+        )
+
+        call_command('run_post_jobs', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PostBulkJob.DONE)
+        self.assertEqual(job.processed, job.total)
+        self.assertEqual(
+            Post.objects.filter(group__isnull=True).count(),
+            posts.filter(pk__gte=resume_from).count())
+
+    def test_running_job_is_not_taken_twice(self):
+        """run_post_jobs не берёт задачу, которую выполняет другой
+        процесс, но забирает ту, что давно не сохраняла прогресс.
+        """
+        posts = Post.objects.order_by('pk')
+        job = PostBulkJob.objects.create(
+            action=PostBulkJob.CLEAR_GROUP,
+            selection=pickle.dumps(posts.query),
+            status=PostBulkJob.RUNNING,
+            total=posts.count(),
+            position=posts[0].pk,
+            heartbeat=timezone.now(),
+        )
+
+        call_command('run_post_jobs', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PostBulkJob.RUNNING)
+        self.assertEqual(job.processed, 0)
+
+        job.heartbeat -= timedelta(hours=1)
+        job.save()
+        call_command('run_post_jobs', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, PostBulkJob.DONE)
+        self.assertEqual(job.processed, job.total)
@@ -0,0 +1,203 @@
+import asyncio
+import json
+import threading
+import time
+from unittest import mock
+
+from django.test import Client, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from .. import live
+from ..models import Group, Post, User
+
+
+def publish_later(broker, post_id, group_id, author_id):
+    timer = threading.Timer(
+        0.05, broker.publish, (post_id, group_id, author_id, time.time()))
+    timer.start()
+    return timer
+
+
+def ids(events):
+    return [event.post_id for event in events]
+
+
+class BrokerTests(TestCase):
+    def setUp(self):
+        self.broker = live.Broker()
+
+    def test_wait_filters_by_stream(self):
+        """Подписчик получает только события своего потока."""
+        old = time.time() - 3600
+        self.broker.publish(1, 10, 100, old)
+        self.broker.publish(2, None, 200, old)
+
+        self.assertEqual(
+            ids(self.broker.wait(live.Cursor(0), ('all', None), 0)), [1, 2])
+        self.assertEqual(
+            ids(self.broker.wait(live.Cursor(0), ('group', 10), 0)), [1])
+        self.assertEqual(
+            self.broker.wait(live.Cursor(1), ('author', 100), 0), [])
+
+    def test_late_commit_is_delivered(self):
+        """Пост, закоммиченный позже поста с большим id, не теряется ни
+        брокером, ни подписчиком, который уже получил больший id, в том
+        числе после переподключения с курсором.
+        """
+        cursor = live.Cursor(9)
+        self.broker.publish(11, None, 1, time.time())
+        cursor.add(self.broker.wait(cursor, ('all', None), 0))
+        self.broker.publish(10, None, 1, time.time())
+        self.broker.publish(11, None, 1, time.time())
+
+        self.assertEqual(ids(self.broker.events), [11, 10])
+        self.assertEqual(str(cursor), '9:11')
+        for current in (cursor, live.Cursor.parse(str(cursor))):
+            self.assertEqual(
+                ids(self.broker.wait(current, ('all', None), 0)), [10])
+
+    def test_cursor_settles(self):
+        """Посты старше LIVE_LATE_SECONDS сдвигают after_id, и курсор
+        не растёт.
+        """
+        cursor = live.Cursor(1)
+        cursor.add([live.Event(2, None, 1, time.time() - 3600),
+                    live.Event(3, None, 1, time.time())])
+        self.assertEqual(str(cursor), '2:3')
+        self.assertIsNone(live.Cursor.parse('abc'))
+        self.assertEqual(str(live.Cursor.parse('5')), '5:')
+
+    def test_wait_wakes_on_publish(self):
+        """Ожидающий поток просыпается, когда пост опубликован."""
+        publish_later(self.broker, 5, None, 1)
+        events = self.broker.wait(live.Cursor(0), ('all', None), 5)
+        self.assertEqual(ids(events), [5])
+
+    def test_async_wait_wakes_on_publish(self):
+        """Асинхронный подписчик ждёт без потока и просыпается."""
+        publish_later(self.broker, 7, None, 1)
+        events = asyncio.run(
+            self.broker.wait_async(live.Cursor(0), ('all', None), 5))
+        self.assertEqual(ids(events), [7])
+        self.assertEqual(self.broker.waiters, set())
+
+    def test_async_wait_timeout(self):
+        """Без событий асинхронное ожидание кончается по таймауту."""
+        events = asyncio.run(
+            self.broker.wait_async(live.Cursor(0), ('all', None), 0.01))
+        self.assertEqual(events, [])
+
+
+class LiveViewTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='live_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание')
+
+    def setUp(self):
+        live.broker = live.Broker()
+        self.guest_client = Client()
+        self.first = Post.objects.create(
+            text='Пост', author=LiveViewTests.user)
+        self.second = Post.objects.create(
+            text='Пост в группе', author=LiveViewTests.user,
+            group=LiveViewTests.group)
+
+    def test_poll(self):
+        """Опрос отдаёт курсор на последний пост, затем новые посты
+        потока.
+        """
+        url = reverse('posts:live_poll')
+        data = self.guest_client.get(url).json()
+        self.assertEqual(data, {'posts': [], 'cursor': f'{self.second.pk}:'})
+
+        data = self.guest_client.get(url, {
+            'cursor': self.first.pk - 1, 'group': 'test-slug'}).json()
+        self.assertEqual(data, {
+            'posts': [self.second.pk],
+            'cursor': f'{self.first.pk - 1}:{self.second.pk}'})
+
+        response = self.guest_client.get(url, {'group': 'missing'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_poll_does_not_wait(self):
+        """Опрос без новых постов отвечает сразу, не ожидая брокер."""
+        with mock.patch.object(live.broker, 'wait') as wait:
+            data = self.guest_client.get(
+                reverse('posts:live_poll'), {'cursor': self.second.pk}).json()
+
+        self.assertEqual(data['posts'], [])
+        wait.assert_not_called()
+
+    def test_page_uses_sse_only_with_asgi(self):
+        """Без ASGI-сервера страница не держит поток WSGI через SSE."""
+        url = reverse('posts:index')
+        self.assertNotContains(self.guest_client.get(url), 'EventSource')
+        with override_settings(LIVE_SSE=True):
+            self.assertContains(self.guest_client.get(url), 'EventSource')
+
+    @override_settings(LIVE_SSE_SECONDS=0)
+    def test_event_stream(self):
+        """SSE досылает посты после Last-Event-ID."""
+        response = self.guest_client.get(
+            reverse('posts:live_events'),
+            HTTP_LAST_EVENT_ID=str(self.first.pk))
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join(response.streaming_content).decode()
+        self.assertIn(f'id: {self.first.pk}:{self.second.pk}\n', body)
+        self.assertNotIn(f'"id": {self.first.pk},', body)
+
+    def test_poller_publishes_new_posts(self):
+        """Опрос базы публикует посты, созданные после старта."""
+        poller = live.DatabasePoller()
+        poller.poll()
+        post = Post.objects.create(text='Новый', author=LiveViewTests.user)
+        poller.poll()
+        self.assertEqual(
+            [event.post_id for event in live.broker.events], [post.pk])
+
+
+class LivePublishTests(TransactionTestCase):
+    def setUp(self):
+        live.broker = live.Broker()
+        self.user = User.objects.create_user(username='publisher')
+
+    def test_new_post_published_after_commit(self):
+        """Новый пост попадает в брокер после коммита."""
+        post = Post.objects.create(text='Пост', author=self.user)
+        self.assertEqual(live.broker.last_id, post.pk)
+
+    def test_asgi_event_stream(self):
+        """ASGI-приложение отдаёт события и закрывается при отключении."""
+        from yatube import live_asgi
+
+        post = Post.objects.create(text='Пост', author=self.user)
+        sent = []
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if b'event: post' in message.get('body', b''):
+                disconnected.set()
+
+        scope = {
+            'type': 'http',
+            'query_string': b'',
+            'headers': [(b'last-event-id', str(post.pk - 1).encode())],
+        }
+        with mock.patch.object(live.poller, 'start'):
+            asyncio.run(asyncio.wait_for(
+                live_asgi.application(scope, receive, send), 5))
+
+        self.assertEqual(sent[0]['status'], 200)
+        event = sent[-1]['body'].decode()
+        data = json.loads(event.split('data: ')[1])
+        self.assertEqual(data['id'], post.pk)
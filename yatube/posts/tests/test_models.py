@@ -1,6 +1,7 @@
 from django.test import TestCase
 
 from ..models import Group, Post, User
+from .factories import PASSWORD, make_groups, make_posts, make_users
 
 
 class PostModelTest(TestCase):
@@ -24,3 +25,19 @@ class PostModelTest(TestCase):
         """
         self.assertEqual(str(self.post), PostModelTest.post.text[:15])
         self.assertEqual(str(self.group), PostModelTest.group.title)
+
+
+class FactoryTests(TestCase):
+    def test_bulk_factories_return_saved_rows(self):
+        """Фабрики создают строки пачкой и отдают их с pk."""
+        users = make_users(3)
+        groups = make_groups(2)
+        posts = make_posts(5, author=users[0], group=groups[1])
+
+        self.assertEqual([user.username for user in users],
+                         ['user0', 'user1', 'user2'])
+        self.assertTrue(users[2].check_password(PASSWORD))
+        self.assertEqual(len(posts), 5)
+        self.assertTrue(all(post.pk for post in posts))
+        self.assertEqual(groups[1].posts.count(), 5)
+        self.assertEqual(groups[1].stats.post_count, 5)
@@ -0,0 +1,90 @@
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import render
+from ..models import Post, User
+
+
+class SanitizeTests(TestCase):
+    def test_unsafe_markup_removed(self):
+        """Скрипты, атрибуты и опасные ссылки вырезаются."""
+        html = render.sanitize(
+            '<p onclick="x()">Текст<script>alert(1)</script></p>'
+            '<a href="javascript:alert(1)">ссылка</a>'
+            '<a href="https://example.com">сайт</a><div>блок')
+        self.assertEqual(
+            html,
+            '<p>Текст</p><a>ссылка</a>'
+            '<a href="https://example.com">сайт</a>блок')
+
+    def test_text_is_escaped(self):
+        """HTML в тексте поста выводится как текст."""
+        with mock.patch.object(render, 'markdown', None):
+            html = render.render_html('<b>жирный</b>\n\n**текст**')
+        self.assertEqual(
+            html, '<p>&lt;b&gt;жирный&lt;/b&gt;</p>\n\n<p>**текст**</p>')
+
+    @skipUnless(render.markdown, 'пакет markdown не установлен')
+    def test_markdown_is_sanitized(self):
+        """Markdown превращается в HTML, опасные теги вырезаются."""
+        html = render.render_html(
+            '**жирный** [ссылка](javascript:alert(1))\n\n'
+            '<script>alert(1)</script>')
+        self.assertEqual(
+            html, '<p><strong>жирный</strong> <a>ссылка</a></p>\n')
+
+
+class RenderPostTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+
+    def test_rendered_on_save(self):
+        """HTML и заголовок поста готовятся при сохранении."""
+        post = Post.objects.create(
+            text='Очень длинный текст поста для проверки заголовка',
+            author=RenderPostTests.user)
+
+        self.assertEqual(post.render_version, render.VERSION)
+        self.assertIn('Очень длинный текст', post.text_html)
+        self.assertEqual(len(post.headline), render.HEADLINE_LENGTH)
+
+        post = Post.objects.get(pk=post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertIn('Новый текст', post.text_html)
+
+    def test_feed_loads_excerpt_only(self):
+        """Лента показывает анонс и не загружает полный текст."""
+        Post.objects.create(
+            text='Начало. ' + 'длинный текст ' * 1000,
+            author=RenderPostTests.user)
+
+        with CaptureQueriesContext(connection) as context:
+            response = Client().get(reverse('posts:index'))
+
+        self.assertContains(response, 'Начало.')
+        self.assertLess(len(response.content), 10000)
+        sql = ' '.join(query['sql'] for query in context)
+        self.assertNotIn('"posts_post"."text"', sql)
+        self.assertIn('"posts_post"."excerpt_html"', sql)
+
+    def test_rerender_command_updates_stale_posts(self):
+        """Команда rerender_posts обновляет посты старой версии."""
+        post = Post.objects.create(text='Текст', author=RenderPostTests.user)
+        Post.objects.filter(pk=post.pk).update(
+            text_html='', render_version='0:plain')
+
+        call_command('rerender_posts', batch_size=1, stdout=StringIO())
+
+        post.refresh_from_db()
+        self.assertEqual(post.render_version, render.VERSION)
+        self.assertIn('Текст', post.text_html)
@@ -0,0 +1,68 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+@override_settings(POSTS_STREAM_MIN_PAGE_SIZE=10, POSTS_MAX_PER_PAGE=20)
+class StreamingFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='streamer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание')
+        Post.objects.bulk_create(
+            Post(text=f'Пост номер {i}', author=cls.user, group=cls.group)
+            for i in range(30))
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_small_page_is_rendered(self):
+        """Обычная страница рендерится целиком."""
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.context['page_obj']), 10)
+
+    def test_large_page_is_streamed(self):
+        """Большая страница отдаётся потоком со всеми постами."""
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=('test-slug',)),
+            reverse('posts:profile', args=('streamer',)),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, {'per_page': 12})
+                self.assertTrue(response.streaming)
+                content = b''.join(response.streaming_content).decode()
+                self.assertEqual(content.count('<article>'), 12)
+                self.assertEqual(content.count('<hr>'), 11)
+                self.assertIn('per_page=12', content)
+                self.assertIn('</body>', content)
+
+    def test_page_size_is_capped(self):
+        """per_page не больше POSTS_MAX_PER_PAGE."""
+        response = self.guest_client.get(
+            reverse('posts:index'), {'per_page': 1000})
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content.count('<article>'), 20)
+
+    def test_head_is_sent_before_posts_are_loaded(self):
+        """Начало страницы отдаётся до выборки постов."""
+        response = self.guest_client.get(
+            reverse('posts:index'), {'per_page': 12})
+        chunks = iter(response.streaming_content)
+
+        with CaptureQueriesContext(connection) as context:
+            head = next(chunks).decode()
+        self.assertIn('<header>', head)
+        self.assertEqual(len(context), 0)
+
+        with CaptureQueriesContext(connection) as context:
+            rest = b''.join(chunks).decode()
+        self.assertEqual(len(context), 1)
+        self.assertIn('Пост номер', rest)
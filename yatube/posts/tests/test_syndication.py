@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class SyndicationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='blogger')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание')
+        cls.other_group = Group.objects.create(
+            title='Другая группа', slug='other-slug', description='Описание')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.post = Post.objects.create(
+            text='Пост в группе', author=SyndicationTests.user,
+            group=SyndicationTests.group)
+
+    def test_feeds_available(self):
+        """Все ленты отдаются и содержат пост."""
+        urls = (
+            reverse('posts:rss'),
+            reverse('posts:atom'),
+            reverse('posts:group_rss', args=('test-slug',)),
+            reverse('posts:group_atom', args=('test-slug',)),
+            reverse('posts:profile_rss', args=('blogger',)),
+            reverse('posts:profile_atom', args=('blogger',)),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Пост в группе')
+        response = self.guest_client.get(
+            reverse('posts:group_rss', args=('other-slug',)))
+        self.assertNotContains(response, 'Пост в группе')
+        response = self.guest_client.get(
+            reverse('posts:group_rss', args=('missing',)))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unchanged_feed_is_not_modified(self):
+        """Повторный опрос без изменений получает 304, прочитав из базы
+        только отметку изменения ленты.
+        """
+        url = reverse('posts:rss')
+        response = self.guest_client.get(url)
+
+        with CaptureQueriesContext(connection) as context:
+            cached = self.guest_client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(len(context), 1)
+
+        cached = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_edit_invalidates_feed(self):
+        """Правка поста меняет ETag ленты и её содержимое."""
+        url = reverse('posts:group_rss', args=('test-slug',))
+        etag = self.guest_client.get(url)['ETag']
+
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный пост'
+        post.save()
+
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Исправленный пост')
+
+    def test_moving_post_invalidates_old_group(self):
+        """Перенос поста обновляет ленту прежней группы."""
+        url = reverse('posts:group_rss', args=('test-slug',))
+        etag = self.guest_client.get(url)['ETag']
+
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = SyndicationTests.other_group
+        post.save()
+
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotContains(response, 'Пост в группе')
+
+    def test_author_edit_invalidates_feeds(self):
+        """Смена имени автора обновляет ленты с его постами."""
+        url = reverse('posts:profile_rss', args=('blogger',))
+        etags = {
+            url: self.guest_client.get(url)['ETag']
+            for url in (url, reverse('posts:rss'))
+        }
+
+        user = User.objects.get(pk=SyndicationTests.user.pk)
+        user.first_name = 'Новое'
+        user.last_name = 'Имя'
+        user.save()
+
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, 'Новое Имя')
@@ -0,0 +1,165 @@
+import threading
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import view_counts
+from ..models import Post, User
+from .factories import make_posts
+
+THREADS = 8
+HITS = 500
+
+
+class ViewCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='viewed')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        for store in view_counts.stores.values():
+            store.take()
+
+    def test_hits_are_written_in_one_update(self):
+        """Просмотры копятся в памяти и пишутся в базу одним UPDATE."""
+        posts = make_posts(3, author=ViewCountTests.author)
+        for count, post in enumerate(posts, 1):
+            for _ in range(count):
+                view_counts.hit(post.pk)
+        self.assertEqual(Post.objects.get(pk=posts[2].pk).views, 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(view_counts.flush(), 6)
+
+        updates = [q for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            [Post.objects.get(pk=post.pk).views for post in posts],
+            [1, 2, 3])
+        self.assertEqual(view_counts.flush(), 0)
+
+    def test_concurrent_hits(self):
+        """Одновременные просмотры из потоков не теряются."""
+        pk = ViewCountTests.post.pk
+
+        def view():
+            for _ in range(HITS):
+                view_counts.hit(pk)
+
+        threads = [threading.Thread(target=view) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        view_counts.flush()
+
+        self.assertEqual(Post.objects.get(pk=pk).views, THREADS * HITS)
+
+    # в тестах кэш locmem, но процесс один
+    @override_settings(POST_VIEWS_BACKEND='cache', SHARED_CACHE=True)
+    def test_cache_backend(self):
+        """Счётчики в кэше видны до записи и обнуляются после неё."""
+        post = ViewCountTests.post
+        view_counts.hit(post.pk)
+        view_counts.hit(post.pk)
+
+        self.assertEqual(view_counts.get_views(post), 2)
+        self.assertEqual(view_counts.flush(), 2)
+        post.refresh_from_db()
+        self.assertEqual(post.views, 2)
+        self.assertEqual(view_counts.get_views(post), 2)
+
+    @override_settings(POST_VIEWS_BACKEND='cache', SHARED_CACHE=False)
+    def test_cache_backend_needs_shared_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            view_counts.hit(ViewCountTests.post.pk)
+
+    def test_failed_write_keeps_counts(self):
+        view_counts.hit(ViewCountTests.post.pk)
+        with mock.patch.object(view_counts, 'write', side_effect=Exception):
+            with self.assertLogs('posts.view_counts', 'ERROR'):
+                self.assertEqual(view_counts.flush(), 0)
+
+        self.assertEqual(view_counts.flush(), 1)
+
+    def test_save_does_not_overwrite_views(self):
+        """Сохранение поста не затирает записанные после чтения просмотры."""
+        post = Post.objects.get(pk=ViewCountTests.post.pk)
+        view_counts.hit(post.pk)
+        view_counts.flush()
+
+        post.text = 'Новый текст'
+        post.save()
+
+        post.refresh_from_db()
+        self.assertEqual(post.views, 1)
+        self.assertEqual(post.text, 'Новый текст')
+
+    def test_save_does_not_overwrite_comment_count(self):
+        """Сохранение поста не затирает счётчик комментариев."""
+        post = Post.objects.get(pk=ViewCountTests.post.pk)
+        Post.objects.filter(pk=post.pk).update(comment_count=3)
+
+        post.text = 'Новый текст'
+        post.save()
+
+        post.refresh_from_db()
+        self.assertEqual(post.comment_count, 3)
+
+    def test_save_copy_and_force_insert(self):
+        """Копия с pk = None и force_insert создают новый пост."""
+        post = Post.objects.get(pk=ViewCountTests.post.pk)
+        post.pk = None
+        post.save()
+        copy = Post.objects.get(pk=post.pk)
+        copy.pk = None
+        copy.save(force_insert=True)
+
+        self.assertEqual(
+            Post.objects.filter(text=ViewCountTests.post.text).count(), 3)
+
+    def test_save_deferred_post(self):
+        """Пост, загруженный через only(), сохраняет только загруженные
+        поля и не подгружает остальные.
+        """
+        post = Post.objects.only('pk', 'group').get(
+            pk=ViewCountTests.post.pk)
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+
+        updates = [q['sql'] for q in queries
+                   if q['sql'].startswith('UPDATE "posts_post"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"text"', updates[0])
+        post.refresh_from_db()
+        self.assertEqual(post.text, ViewCountTests.post.text)
+
+    def test_post_detail_counts_views(self):
+        url = reverse('posts:post_detail', args=[ViewCountTests.post.pk])
+        self.client.get(url)
+        response = self.client.get(url)
+
+        self.assertEqual(response.context['views'], 2)
+
+    def test_popular(self):
+        """Популярные записи отсортированы по просмотрам."""
+        quiet, popular = make_posts(2, author=ViewCountTests.author)
+        for _ in range(3):
+            view_counts.hit(popular.pk)
+        view_counts.hit(quiet.pk)
+        view_counts.flush()
+
+        response = self.client.get(reverse('posts:popular'))
+
+        self.assertEqual(
+            list(response.context['page_obj'])[:3],
+            [popular, quiet, ViewCountTests.post])
+        self.assertContains(response, 'Просмотров: 3')
@@ -1,7 +1,10 @@
 from django import forms
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from core.middleware import PIN_COOKIE
+
 from ..forms import PostForm
 from ..models import Group, Post, User
 from ..views import POSTS_COUNT
@@ -292,3 +295,63 @@ class PostPaginatorViewTests(TestCase):
         posts_count_from_context = len(response.context['page_obj'])
         posts_on_second_page = Post.objects.count() % POSTS_COUNT
         self.assertEqual(posts_count_from_context, posts_on_second_page)
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='cached_author')
+        cls.group = Group.objects.create(
+            title='Кэшируемая группа', slug='cached', description='-')
+        Post.objects.create(
+            text='Пост в группе', author=cls.author, group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_page_is_cached(self):
+        """Повторный запрос ленты не выбирает посты из базы, только
+        отметку изменения ленты.
+        """
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_list', args=['cached'])):
+            with self.subTest(url=url):
+                self.client.get(url)
+                with self.assertNumQueries(2 if 'group' in url else 1):
+                    response = self.client.get(url)
+                self.assertEqual(len(response.context['page_obj']), 1)
+                self.assertEqual(
+                    response.context['page_obj'].paginator.count, 1)
+
+    def test_out_of_range_pages_share_cache_key(self):
+        """Номера страниц за пределами ленты кэшируются как последняя."""
+        url = reverse('posts:index')
+        self.client.get(url, {'page': 1})
+        for page in (2, 10 ** 6, 'abc'):
+            with self.subTest(page=page):
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, {'page': page})
+                self.assertEqual(response.context['page_obj'].number, 1)
+
+    def test_pinned_client_skips_cache(self):
+        """Клиент, привязанный к основной базе, читает ленту из неё."""
+        url = reverse('posts:index')
+        self.client.get(url)
+        self.client.cookies[PIN_COOKIE] = '9999999999'
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+    def test_new_post_shows_up_at_once(self):
+        """Новый пост сразу виден в закэшированных лентах."""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:group_list', args=['cached']))
+        post = Post.objects.create(
+            text='Новый пост', author=FeedCacheTests.author,
+            group=FeedCacheTests.group)
+
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_list', args=['cached'])):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.context['page_obj'][0], post)
@@ -1,14 +1,67 @@
 from django.urls import path
 
-from . import views
+from . import syndication, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('groups/', views.group_index, name='group_index'),
+    path('popular/', views.popular, name='popular'),
+    path('archive/', views.archive_index, name='archive_index'),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.archive_month,
+        name='archive_month'
+    ),
+    path(
+        'archive/<int:year>/<int:month>/<int:day>/',
+        views.archive_day,
+        name='archive_day'
+    ),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('rss/', syndication.LatestPostsFeed(), name='rss'),
+    path('atom/', syndication.LatestPostsAtomFeed(), name='atom'),
+    path(
+        'group/<slug:slug>/rss/',
+        syndication.GroupPostsFeed(),
+        name='group_rss'
+    ),
+    path(
+        'group/<slug:slug>/atom/',
+        syndication.GroupPostsAtomFeed(),
+        name='group_atom'
+    ),
+    path(
+        'profile/<str:username>/rss/',
+        syndication.AuthorPostsFeed(),
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        syndication.AuthorPostsAtomFeed(),
+        name='profile_atom'
+    ),
+    path('live/poll/', views.live_poll, name='live_poll'),
+    path('live/events/', views.live_events, name='live_events'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/comment/',
+        views.add_comment,
+        name='add_comment'
+    ),
+    path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'profile/<str:username>/follow/',
+        views.profile_follow,
+        name='profile_follow'
+    ),
+    path(
+        'profile/<str:username>/unfollow/',
+        views.profile_unfollow,
+        name='profile_unfollow'
+    ),
 ]
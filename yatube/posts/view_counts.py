@@ -0,0 +1,193 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = 'post_views:{}'
+FLUSH_LOCK_KEY = 'post_views:flush'
+# постов в одном UPDATE: по три параметра на пост, в SQLite их до 999
+WRITE_BATCH_SIZE = 300
+
+
+class LocalCounts:
+    """Ещё не записанные в базу просмотры в памяти процесса."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+
+    def add(self, post_id, count=1):
+        with self.lock:
+            self.counts[post_id] += count
+
+    def pending(self, post_ids):
+        with self.lock:
+            return {post_id: self.counts[post_id]
+                    for post_id in post_ids if post_id in self.counts}
+
+    def take(self):
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+        return counts
+
+    def restore(self, counts):
+        with self.lock:
+            self.counts.update(counts)
+
+
+class CacheCounts:
+    """Ещё не записанные в базу просмотры в кэше, общем для процессов.
+
+    Процесс записывает в базу счётчики тех постов, которые видел сам;
+    счётчик вычитается из кэша через decr, поэтому просмотры, добавленные
+    другими процессами во время записи, не теряются.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seen = set()
+
+    def add(self, post_id, count=1):
+        key = CACHE_KEY.format(post_id)
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            # счётчика ещё нет; add() не затрёт созданный другим процессом
+            if not cache.add(key, count, None):
+                cache.incr(key, count)
+        with self.lock:
+            self.seen.add(post_id)
+
+    def pending(self, post_ids):
+        keys = {CACHE_KEY.format(post_id): post_id for post_id in post_ids}
+        return {keys[key]: count
+                for key, count in cache.get_many(keys).items() if count}
+
+    def take(self):
+        with self.lock:
+            post_ids, self.seen = self.seen, set()
+        counts = Counter(self.pending(post_ids))
+        for post_id, count in counts.items():
+            try:
+                cache.decr(CACHE_KEY.format(post_id), count)
+            except ValueError:
+                # счётчик вытеснен из кэша после get_many
+                pass
+        return counts
+
+    def restore(self, counts):
+        for post_id, count in counts.items():
+            self.add(post_id, count)
+
+
+stores = {'local': LocalCounts(), 'cache': CacheCounts()}
+
+
+def get_store():
+    if settings.POST_VIEWS_BACKEND == 'cache' and not settings.SHARED_CACHE:
+        # в locmem у каждого процесса свои счётчики, а flush() одного
+        # процесса записывает только те, что видел сам
+        raise ImproperlyConfigured(
+            "POST_VIEWS_BACKEND = 'cache' требует общего кэша, не locmem")
+    return stores[settings.POST_VIEWS_BACKEND]
+
+
+def write(counts):
+    """Прибавляет counts к Post.views пачками по WRITE_BATCH_SIZE постов
+    в одной транзакции.
+    """
+    post_ids = list(counts)
+    with transaction.atomic():
+        for start in range(0, len(post_ids), WRITE_BATCH_SIZE):
+            batch = post_ids[start:start + WRITE_BATCH_SIZE]
+            Post.objects.filter(pk__in=batch).update(views=F('views') + Case(
+                *(When(pk=post_id, then=Value(counts[post_id]))
+                  for post_id in batch),
+                default=Value(0),
+                output_field=PositiveIntegerField(),
+            ))
+
+
+def flush():
+    """Записывает накопленные просмотры в базу. Возвращает их число."""
+    store = get_store()
+    if isinstance(store, CacheCounts) and not cache.add(
+            FLUSH_LOCK_KEY, True, settings.POST_VIEWS_FLUSH_INTERVAL):
+        # счётчики в кэше сейчас записывает другой процесс
+        return 0
+    try:
+        counts = store.take()
+        if not counts:
+            return 0
+        try:
+            write(counts)
+        except Exception:
+            store.restore(counts)
+            logger.exception('Просмотры не записаны')
+            return 0
+        return sum(counts.values())
+    finally:
+        flusher.last = time.monotonic()
+        if isinstance(store, CacheCounts):
+            cache.delete(FLUSH_LOCK_KEY)
+
+
+class Flusher:
+    """Фоновый поток, который раз в POST_VIEWS_FLUSH_INTERVAL вызывает
+    flush(), и ещё раз при завершении процесса. Запускается при первом
+    просмотре в каждом процессе, в том числе рабочем процессе после fork().
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.worker = None
+        self.last = time.monotonic()
+        self.registered = False
+
+    def start(self):
+        if self.worker is not None and self.worker.is_alive():
+            return
+        with self.lock:
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(
+                    target=self.run, name='post-views', daemon=True)
+                self.worker.start()
+            if not self.registered:
+                atexit.register(flush)
+                self.registered = True
+
+    def run(self):
+        while True:
+            time.sleep(settings.POST_VIEWS_FLUSH_INTERVAL)
+            try:
+                flush()
+            except Exception:
+                logger.exception('Сбой записи просмотров')
+            finally:
+                close_old_connections()
+
+
+flusher = Flusher()
+
+
+def hit(post_id):
+    """Учитывает просмотр поста без запроса к базе."""
+    get_store().add(post_id)
+    if settings.POST_VIEWS_ASYNC:
+        flusher.start()
+    elif (time.monotonic() - flusher.last
+          >= settings.POST_VIEWS_FLUSH_INTERVAL):
+        flush()
+
+
+def get_views(post):
+    """Просмотры поста с учётом ещё не записанных в базу."""
+    return post.views + get_store().pending([post.pk]).get(post.pk, 0)
@@ -1,67 +1,257 @@
+import datetime
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+
+from core.cache import get_or_compute
+from core.middleware import is_pinned
+from core.streaming import stream_render
 
-from .forms import PostForm
-from .models import Group, Post, User
+from . import archive, comments, feed, live, syndication, view_counts
+from .forms import CommentForm, PostForm
+from .models import Follow, Group, Post, PostDayCount, User
 
 POSTS_COUNT = 10
+FEED_COUNT_KEY = 'posts:feed:{}:count'
+FEED_PAGE_KEY = 'posts:feed:{}:{}:{}'
+GROUP_COUNT_KEY = 'posts:groups:count'
+GROUP_INDEX_KEY = 'posts:groups:{}:{}'
+
+
+def get_page_size(request):
+    try:
+        size = int(request.GET.get('per_page', POSTS_COUNT))
+    except ValueError:
+        return POSTS_COUNT
+    return max(1, min(size, settings.POSTS_MAX_PER_PAGE))
 
 
 def get_paginator(data, request):
-    paginator = Paginator(data, POSTS_COUNT)
+    paginator = Paginator(data, get_page_size(request))
     page_number = request.GET.get('page')
     posts = paginator.get_page(page_number)
     return posts
 
 
+def get_feed_page(request, post_list, stream):
+    """get_paginator() для лент, которые кэшируются целиком.
+
+    Число постов и страницы кэшируются, пока не изменилась лента stream
+    (отметка posts.syndication в базе, общая для процессов; пока её нет,
+    версия - None). Ключ
+    строится по номеру страницы после проверки пагинатором, так что
+    ?page=N за пределами ленты не плодит записи в кэше. Отметка
+    читается из той же базы, что и посты: страница отставшей реплики
+    кэшируется под старой отметкой и пересчитывается, когда реплика
+    догонит основную базу.
+
+    Большие страницы отдаются потоком и в кэш не попадают, как и
+    страницы клиента, привязанного к основной базе (см.
+    core.middleware.is_pinned): он должен сразу увидеть свою запись.
+    """
+    paginator = Paginator(post_list, get_page_size(request))
+    if (
+        paginator.per_page > settings.POSTS_STREAM_MIN_PAGE_SIZE
+        or is_pinned(request)
+    ):
+        return paginator.get_page(request.GET.get('page'))
+    version = syndication.get_marker(stream)
+    paginator.count = get_or_compute(
+        FEED_COUNT_KEY.format(stream),
+        post_list.count,
+        settings.FEED_CACHE_SECONDS,
+        version=version,
+    )
+    page = paginator.get_page(request.GET.get('page'))
+    posts = get_or_compute(
+        FEED_PAGE_KEY.format(stream, paginator.per_page, page.number),
+        lambda: list(page),
+        settings.FEED_CACHE_SECONDS,
+        version=version,
+    )
+    return Page(posts, page.number, paginator)
+
+
+def render_feed(request, template_name, context, **item_context):
+    """render() для лент постов: большая страница отдаётся потоком,
+    посты выбираются итератором и выводятся по одному.
+    """
+    page = context['page_obj']
+    if page.paginator.per_page <= settings.POSTS_STREAM_MIN_PAGE_SIZE:
+        return render(request, template_name, context)
+    return stream_render(
+        request,
+        template_name,
+        context,
+        page.object_list.iterator(),
+        'posts/includes/feed_item.html',
+        item_context,
+    )
+
+
 def index(request):
     title = 'Последние обновления на сайте'
-    post_list = Post.objects.select_related('author', 'group')
+    post_list = Post.objects.select_related('author', 'group').for_feed()
 
-    posts = get_paginator(post_list, request)
+    posts = get_feed_page(request, post_list, 'all')
 
     context = {
         'page_obj': posts,
-        'title': title
+        'title': title,
+        'live_sse': settings.LIVE_SSE,
+        'live_poll_seconds': settings.LIVE_CLIENT_POLL_SECONDS,
     }
-    return render(request, 'posts/index.html', context)
+    return render_feed(request, 'posts/index.html', context)
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
+    post_list = group.posts.select_related('author').for_feed()
 
-    posts = get_paginator(post_list, request)
+    posts = get_feed_page(request, post_list, f'group:{group.pk}')
 
     context = {
         'group': group,
         'page_obj': posts,
+        'live_sse': settings.LIVE_SSE,
+        'live_poll_seconds': settings.LIVE_CLIENT_POLL_SECONDS,
     }
-    return render(request, 'posts/group_list.html', context)
+    return render_feed(
+        request, 'posts/group_list.html', context, hide_group=True)
+
+
+def popular(request):
+    # views записываются пачками, порядок отстаёт от счётчиков не больше
+    # чем на POST_VIEWS_FLUSH_INTERVAL
+    post_list = (
+        Post.objects.select_related('author', 'group').for_feed()
+        .order_by('-views', '-pk')
+    )
+
+    posts = get_paginator(post_list, request)
+
+    context = {
+        'page_obj': posts,
+    }
+    return render_feed(
+        request, 'posts/popular.html', context, show_views=True)
+
+
+def group_index(request):
+    # агрегаты берутся из GroupStats, а не считаются по постам; в кэше
+    # только данные, страница с шапкой пользователя рисуется на запрос
+    group_list = Group.objects.select_related('stats').order_by('slug')
+    timeout = settings.GROUP_INDEX_CACHE_SECONDS
+    paginator = Paginator(group_list, get_page_size(request))
+    paginator.count = cache.get_or_set(
+        GROUP_COUNT_KEY, group_list.count, timeout)
+    groups = paginator.get_page(request.GET.get('page'))
+    groups.object_list = cache.get_or_set(
+        GROUP_INDEX_KEY.format(paginator.per_page, groups.number),
+        lambda: list(groups.object_list),
+        timeout)
+
+    context = {
+        'page_obj': groups,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+def render_archive(request, first, last, month, day=None):
+    month_end = archive.next_month(month)
+    if month_end is None:
+        raise Http404
+    counts = archive.get_day_counts(month, month_end)
+    post_list = (
+        archive.posts_between(first, last)
+        .select_related('author', 'group').for_feed()
+    )
+    paginator = Paginator(post_list, POSTS_COUNT)
+    # число постов уже есть в сводке, COUNT(*) по диапазону не нужен
+    paginator.count = sum(
+        count for date, count in counts.items() if first <= date < last)
+    posts = paginator.get_page(request.GET.get('page'))
+    previous_month, next_month = archive.get_neighbours(month, month_end)
+
+    context = {
+        'page_obj': posts,
+        'month': month,
+        'day': day,
+        'calendar': archive.get_calendar(month, counts),
+        'previous_month': previous_month,
+        'next_month': next_month,
+    }
+    return render(request, 'posts/archive.html', context)
+
+
+def archive_index(request):
+    latest = (
+        PostDayCount.objects.order_by('-day')
+        .values_list('day', flat=True).first()
+        or timezone.localdate()
+    )
+    return redirect(
+        'posts:archive_month', year=latest.year, month=latest.month)
+
+
+def archive_month(request, year, month):
+    try:
+        first = datetime.date(year, month, 1)
+    except ValueError:
+        raise Http404
+    return render_archive(request, first, archive.next_month(first), first)
+
+
+def archive_day(request, year, month, day):
+    try:
+        current = datetime.date(year, month, day)
+        following = current + datetime.timedelta(days=1)
+    except (ValueError, OverflowError):
+        raise Http404
+    return render_archive(
+        request, current, following, current.replace(day=1), current)
 
 
 def profile(request, username):
     user = get_object_or_404(User, username=username)
-    post_list = user.posts.all()
+    post_list = user.posts.select_related('group').for_feed()
 
     posts = get_paginator(post_list, request)
 
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(user=request.user, author=user).exists()
+    )
+
     context = {
         'author': user,
         'page_obj': posts,
-        'user_posts_count': post_list.count
+        'user_posts_count': post_list.count,
+        'following': following,
     }
-    return render(request, 'posts/profile.html', context)
+    return render_feed(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id)
     author = post.author
     post_count_user = author.posts.count()
+    view_counts.hit(post.pk)
+    cursor = feed.decode_cursor(request.GET.get('after'))
+    comment_list, next_cursor = comments.get_comments(post, cursor)
     context = {
         'post': post,
-        'post_count_user': post_count_user
+        'post_count_user': post_count_user,
+        'views': view_counts.get_views(post),
+        'comments': comment_list,
+        'next_cursor': next_cursor,
+        'form': CommentForm(),
     }
     return render(request, 'posts/post_detail.html', context)
 
@@ -95,3 +285,90 @@ def post_edit(request, post_id):
         'post': post
     }
     return render(request, 'posts/create_post.html', context)
+
+
+@login_required
+def add_comment(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    form = CommentForm(request.POST or None)
+    if form.is_valid():
+        form.instance.author = request.user
+        form.instance.post = post
+        form.save()
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@login_required
+def follow_index(request):
+    cursor = feed.decode_cursor(request.GET.get('before'))
+    posts, next_cursor = feed.get_feed(request.user, cursor)
+    context = {
+        'posts': posts,
+        'next_cursor': next_cursor,
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        feed.follow(request.user, author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    feed.unfollow(request.user, author)
+    return redirect('posts:profile', username=username)
+
+
+def get_live_stream(request):
+    stream = live.get_stream(request.GET)
+    if stream is None:
+        raise Http404
+    live.ensure_source()
+    return stream
+
+
+def live_poll(request):
+    """Id новых постов после ?cursor= (см. live.Cursor). Без курсора -
+    курсор на последний пост.
+
+    Ответ приходит сразу: ожидание заняло бы синхронный рабочий процесс
+    gunicorn, поэтому страница повторяет запрос раз в
+    LIVE_CLIENT_POLL_SECONDS, а мгновенные уведомления идут только через
+    SSE на ASGI-сервере (LIVE_SSE).
+    """
+    stream = get_live_stream(request)
+    cursor = live.Cursor.parse(request.GET.get('cursor'))
+    if cursor is None:
+        cursor = live.Cursor(live.last_post_id())
+        return JsonResponse({'posts': [], 'cursor': str(cursor)})
+    events = live.catch_up(cursor, stream)
+    cursor.add(events)
+    return JsonResponse({
+        'posts': [event.post_id for event in events],
+        'cursor': str(cursor),
+    })
+
+
+def live_events(request):
+    """Server-Sent Events с id новых постов.
+
+    Соединение занимает поток WSGI на LIVE_SSE_SECONDS, поэтому страницы
+    подключаются сюда, только если путь обслуживает ASGI-сервер
+    yatube.live_asgi (LIVE_SSE), а иначе используют live_poll.
+    """
+    stream = get_live_stream(request)
+    cursor = live.Cursor.parse(
+        request.META.get('HTTP_LAST_EVENT_ID') or request.GET.get('after'))
+    if cursor is None:
+        cursor = live.Cursor(live.last_post_id())
+    response = StreamingHttpResponse(
+        live.event_stream(cursor, stream, settings.LIVE_SSE_SECONDS),
+        content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+COST = settings.PASSWORD_HASHER_COST
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    iterations = COST['pbkdf2']['iterations']
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    time_cost = COST['argon2']['time_cost']
+    memory_cost = COST['argon2']['memory_cost']
+    parallelism = COST['argon2']['parallelism']
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    rounds = COST['bcrypt']['rounds']
@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+PASSWORD = 'Yatube-benchmark-1'
+
+
+class Command(BaseCommand):
+    help = ('Измеряет, сколько входов в секунду выдерживает одно ядро '
+            'при каждой политике хеширования паролей.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=2.0)
+
+    def measure(self, hasher, seconds):
+        encoded = hasher.encode(PASSWORD, hasher.salt())
+        logins = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            hasher.verify(PASSWORD, encoded)
+            logins += 1
+        return logins / seconds
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"policy":<8}{"logins/s/core":>16}')
+        for policy, path in settings.PASSWORD_HASHER_POLICIES.items():
+            hasher = import_string(path)()
+            if hasher.library is not None:
+                try:
+                    hasher._load_library()
+                except ValueError:
+                    self.stdout.write(f'{policy:<8}{"нет библиотеки":>16}')
+                    continue
+            rate = self.measure(hasher, options['seconds'])
+            self.stdout.write(f'{policy:<8}{rate:>16.1f}')
@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .backends import user_cache_key
+
+User = get_user_model()
+
+
+# сессии и пользователи кэшируются только с общим кэшем (SHARED_CACHE),
+# в тестах кэш locmem один на процесс
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=['users.backends.CachedModelBackend'])
+class CachedAuthTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='cached_user', password='old-Passw0rd')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(CachedAuthTests.user)
+
+    def test_authenticated_page_view_has_no_queries(self):
+        """Повторный просмотр страницы вошедшим пользователем
+           не обращается к базе.
+        """
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(url)
+        self.assertContains(response, CachedAuthTests.user.username)
+
+    def test_password_change_refreshes_cached_user(self):
+        """Смена пароля сбрасывает пользователя в кэше,
+           а сам пользователь остаётся в системе.
+        """
+        self.authorized_client.get(reverse('about:author'))
+        key = user_cache_key(CachedAuthTests.user.pk)
+        old_password = cache.get(key).password
+
+        response = self.authorized_client.post(
+            reverse('users:password_change_form'), {
+                'old_password': 'old-Passw0rd',
+                'new_password1': 'new-Passw0rd-42',
+                'new_password2': 'new-Passw0rd-42',
+            })
+        self.assertRedirects(
+            response, reverse('users:password_change_done'))
+
+        response = self.authorized_client.get(reverse('about:author'))
+        self.assertTrue(response.context['user'].is_authenticated)
+        self.assertNotEqual(cache.get(key).password, old_password)
+
+
+class SignedCookieSessionTests(TestCase):
+    def test_session_is_not_read_from_database(self):
+        """Без общего кэша сессия хранится в подписанной cookie,
+           запрос вошедшего пользователя читает из базы только его самого.
+        """
+        self.assertFalse(settings.SHARED_CACHE)
+        user = User.objects.create_user(username='cookie_user')
+        client = Client()
+        client.force_login(user)
+
+        with self.assertNumQueries(1):
+            response = client.get(reverse('about:author'))
+        self.assertContains(response, user.username)
+
+
+class HasherPolicyTests(TestCase):
+    def setUp(self):
+        # вход ограничен THROTTLE_RULES, ведро в кэше общее для процесса
+        cache.clear()
+
+    def test_tests_use_fast_hasher(self):
+        """В тестах новые пароли хешируются быстрым хешером."""
+        user = User.objects.create_user(username='fast', password='pass')
+        self.assertEqual(settings.PASSWORD_HASHER_POLICY, 'fast')
+        self.assertEqual(identify_hasher(user.password).algorithm, 'md5')
+
+    def test_fast_hasher_refused_outside_tests(self):
+        """Вне тестов политика fast не запускается."""
+        env = dict(os.environ, PASSWORD_HASHER_POLICY='fast',
+                   DJANGO_SETTINGS_MODULE='yatube.settings')
+        result = subprocess.run(
+            [sys.executable, '-c', 'import django; django.setup()'],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('ImproperlyConfigured', result.stderr)
+
+    def test_login_rehashes_password_with_current_policy(self):
+        """При входе пароль перехешируется по текущей политике."""
+        user = User.objects.create(
+            username='legacy',
+            password=make_password('legacy-Passw0rd', hasher='pbkdf2_sha256'))
+
+        response = self.client.post(reverse('users:login'), {
+            'username': 'legacy',
+            'password': 'legacy-Passw0rd',
+        })
+        self.assertRedirects(response, reverse(settings.LOGIN_REDIRECT_URL))
+
+        user.refresh_from_db()
+        self.assertEqual(identify_hasher(user.password).algorithm, 'md5')
@@ -0,0 +1,102 @@
+"""
+ASGI-приложение для уведомлений о новых постах (Server-Sent Events).
+
+Django 2.2 не умеет асинхронные view, поэтому долгие соединения SSE
+обслуживает отдельный ASGI-сервер, а прокси направляет на него
+/live/events/, например:
+
+    uvicorn yatube.live_asgi:application
+
+Ожидающее соединение не занимает поток: подписчик ждёт на future
+брокера. Посты создаются в WSGI-процессах, поэтому здесь новые посты
+берутся из базы общим опросом posts.live.poller.
+"""
+
+import asyncio
+import os
+from urllib.parse import parse_qsl
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+django.setup()
+
+from posts import live  # noqa: E402
+
+HEADERS = [
+    (b'content-type', b'text/event-stream'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+
+async def run_sync(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+async def send_text(send, text, more_body=True):
+    await send({
+        'type': 'http.response.body',
+        'body': text.encode(),
+        'more_body': more_body,
+    })
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            live.poller.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def events(scope, receive, send):
+    params = dict(parse_qsl(scope['query_string'].decode()))
+    headers = dict(scope['headers'])
+    stream = await run_sync(live.get_stream, params)
+    if stream is None:
+        await send({'type': 'http.response.start', 'status': 404})
+        await send_text(send, 'Not Found', more_body=False)
+        return
+    cursor = live.Cursor.parse(
+        headers.get(b'last-event-id', b'').decode() or params.get('after'))
+    if cursor is None:
+        cursor = live.Cursor(await run_sync(live.last_post_id))
+    live.poller.start()
+
+    await send({
+        'type': 'http.response.start', 'status': 200, 'headers': HEADERS})
+    await send_text(send, f'retry: {live.RETRY_MS}\n\n')
+    events = await run_sync(live.catch_up, cursor, stream)
+    disconnect = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        while True:
+            if events:
+                await send_text(send, live.format_events(events, cursor))
+            waiting = asyncio.ensure_future(
+                live.broker.wait_async(cursor, stream, live.HEARTBEAT))
+            await asyncio.wait(
+                {waiting, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnect.done():
+                waiting.cancel()
+                return
+            events = waiting.result()
+            if not events:
+                await send_text(send, ': ping\n\n')
+    finally:
+        disconnect.cancel()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] == 'http':
+        await events(scope, receive, send)
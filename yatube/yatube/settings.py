@@ -11,6 +11,9 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import sys
+
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -27,6 +30,15 @@ DEBUG = True
 
 ALLOWED_HOSTS = ['*']
 
+# Проект запущен тестами (manage.py test или pytest)
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+# тестовую базу просят сохранить между запусками:
+# manage.py test --keepdb (-k) или pytest --reuse-db; у pytest -k —
+# фильтр по именам тестов, поэтому он проверяется только для manage.py
+KEEP_TEST_DB = TESTING and (
+    sys.argv[1:2] == ['test'] and bool({'--keepdb', '-k'} & set(sys.argv[2:]))
+    or '--reuse-db' in sys.argv[1:])
+
 
 # Application definition
 
@@ -41,14 +53,18 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.ThrottleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -79,13 +95,225 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Профиль базы выбирается переменной окружения DB_PROFILE.
+DB_PROFILE = os.getenv('DB_PROFILE', default='sqlite')
+
+DB_PROFILES = {
+    'sqlite': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('SQLITE_PATH', default=os.path.join(BASE_DIR, 'db.sqlite3')),
+        # соединение живёт между запросами, а не открывается на каждый
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        # сколько секунд ждать снятия блокировки записи вместо
+        # мгновенного "database is locked"
+        'OPTIONS': {'timeout': 20},
+    },
+    'postgresql': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('POSTGRES_DB', default='yatube'),
+        'USER': os.getenv('POSTGRES_USER', default='yatube'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', default=''),
+        'HOST': os.getenv('POSTGRES_HOST', default='localhost'),
+        'PORT': os.getenv('POSTGRES_PORT', default='5432'),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=600)),
+        # при работе через пулер (pgbouncer в режиме transaction)
+        # серверные курсоры использовать нельзя
+        'DISABLE_SERVER_SIDE_CURSORS': bool(os.getenv('POSTGRES_POOLER')),
+        'OPTIONS': {'connect_timeout': 5},
+    },
+}
+
 DATABASES = {
+    'default': DB_PROFILES[DB_PROFILE],
+}
+if DB_PROFILE == 'sqlite' and KEEP_TEST_DB:
+    # базу в памяти сохранить нельзя: уже мигрированная тестовая база
+    # хранится в файле рядом с основной, параллельные процессы получают
+    # её копии
+    DATABASES['default']['TEST'] = {'NAME': os.path.join(
+        os.path.dirname(DATABASES['default']['NAME']), 'test_db.sqlite3')}
+
+# Реплики только для чтения: DB_REPLICAS=путь1,путь2 для sqlite
+# или хост1,хост2 для postgresql. Тесты их не подключают: чтение с
+# реплик проверяет core.tests.test_routers на своих временных файлах.
+REPLICA_DATABASES = []
+for number, target in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', default='').split(',')), 1):
+    if TESTING:
+        break
+    alias = f'replica{number}'
+    replica = dict(DATABASES['default'])
+    if DB_PROFILE == 'sqlite':
+        replica['NAME'] = target
+    else:
+        replica['HOST'] = target
+    DATABASES[alias] = replica
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# страницы, которые только читают данные и могут идти в реплики
+REPLICA_READ_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'about:author',
+    'about:tech',
+)
+# после записи через эти страницы пользователь REPLICA_PIN_SECONDS
+# читает с основной базы, чтобы сразу увидеть свои изменения
+REPLICA_PIN_VIEWS = (
+    'posts:post_create',
+    'posts:post_edit',
+)
+REPLICA_PIN_SECONDS = 10
+
+# PRAGMA, которые core.db применяет к каждому новому соединению SQLite
+# Сохранённую тестовую базу --parallel копирует файлом, а в режиме WAL
+# её свежие данные ещё лежат в -wal и в копию не попадают.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'DELETE' if KEEP_TEST_DB else 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yatube'),
     },
 }
 
+# Кэш общий для всех рабочих процессов (memcached, redis, файлы, база).
+# Кэш locmem у каждого процесса свой: выход или смена пароля сбросили бы
+# сессию и пользователя только в одном из них, а остальные продолжали бы
+# пускать клиента по старой сессии.
+SHARED_CACHE = not CACHES['default']['BACKEND'].endswith('.LocMemCache')
+
+# С общим кэшем (задайте CACHE_BACKEND, например memcached или redis)
+# сессии читаются из кэша, а в базу только записываются, и пользователь
+# вошедшего клиента тоже берётся из кэша, см.
+# users.backends.CachedModelBackend.
+# Без него сессия хранится в подписанной cookie и тоже не читается из
+# базы. Выход удаляет cookie только у клиента: скопированная раньше
+# cookie действует до SESSION_COOKIE_AGE, смена пароля её отзывает.
+if SHARED_CACHE:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+    AUTHENTICATION_BACKENDS = ['django.contrib.auth.backends.ModelBackend']
+USER_CACHE_TIMEOUT = 60 * 15
+
+
+# Ограничение частоты запросов, см. core.throttling.
+# rate - ёмкость ведра токенов и период его наполнения,
+# scope - считать по пользователю (анонимов - по IP) или только по IP.
+THROTTLE_ENABLED = True
+THROTTLE_RULES = {
+    'posts:post_create': {'rate': '10/m', 'scope': 'user'},
+    'posts:post_edit': {'rate': '30/m', 'scope': 'user'},
+    'posts:add_comment': {'rate': '10/m', 'scope': 'user'},
+    'users:signup': {'rate': '5/h', 'scope': 'ip'},
+    'users:login': {'rate': '10/m', 'scope': 'ip'},
+    'users:password_reset_form': {'rate': '5/h', 'scope': 'ip'},
+}
+# заголовок с адресом клиента, если приложение стоит за прокси,
+# например 'HTTP_X_FORWARDED_FOR', и сколько прокси дописывают в него
+# адрес: клиентом считается THROTTLE_PROXY_COUNT-й адрес справа
+THROTTLE_IP_HEADER = os.getenv('THROTTLE_IP_HEADER')
+THROTTLE_PROXY_COUNT = int(os.getenv('THROTTLE_PROXY_COUNT', default=1))
+
+
+# Массовые операции над постами из админки, см. posts.jobs
+POST_JOBS_BATCH_SIZE = 1000
+# задача, которая столько секунд не сохраняла прогресс, считается
+# прерванной, и run_post_jobs может её забрать
+POST_JOBS_LEASE_SECONDS = 60 * 5
+# в тестах задачи выполняются сразу, в том же потоке
+POST_JOBS_ASYNC = not TESTING
+
+
+# ?per_page= в лентах постов: не больше POSTS_MAX_PER_PAGE, страницы
+# больше POSTS_STREAM_MIN_PAGE_SIZE отдаются потоком, см. core.streaming
+POSTS_MAX_PER_PAGE = 500
+POSTS_STREAM_MIN_PAGE_SIZE = 50
+
+
+# Просмотры постов, см. posts.view_counts: счётчики копятся в памяти
+# процесса (local) или в кэше, общем для процессов (cache), и пишутся
+# в базу одним запросом раз в POST_VIEWS_FLUSH_INTERVAL секунд и при
+# завершении процесса. cache работает только с общим кэшем (SHARED_CACHE).
+POST_VIEWS_BACKEND = os.getenv('POST_VIEWS_BACKEND', default='local')
+POST_VIEWS_FLUSH_INTERVAL = 10
+# в тестах счётчики пишутся в потоке запроса, а не фоновым потоком
+POST_VIEWS_ASYNC = not TESTING
+
+
+# на сколько секунд кэшируется каталог групп
+GROUP_INDEX_CACHE_SECONDS = 60
+
+# Страницы лент index и group_posts в кэше, см. core.cache.get_or_compute:
+# страница свежая FEED_CACHE_SECONDS и пока в ленте ничего не изменилось,
+# затем ещё CACHE_STALE_SECONDS отдаётся, пока её пересчитывает один
+# запрос. CACHE_LOCK_TIMEOUT - дольше пересчёт идти не может,
+# CACHE_LOCK_WAIT - сколько ждать чужого пересчёта, если отдать нечего,
+# CACHE_XFETCH_BETA - насколько рано пересчитывать (0 - только по сроку).
+FEED_CACHE_SECONDS = 60
+CACHE_STALE_SECONDS = 60 * 5
+CACHE_LOCK_TIMEOUT = 10
+CACHE_LOCK_WAIT = 5
+CACHE_XFETCH_BETA = 1
+
+
+# Лента подписок, см. posts.feed: посты авторов, у которых подписчиков
+# не больше FEED_FANOUT_MAX_FOLLOWERS, раскладываются по входящим
+# подписчиков, посты остальных читаются при показе ленты.
+FEED_FANOUT_MAX_FOLLOWERS = 1000
+# сколько последних постов автора добавить во входящие при подписке
+FEED_BACKFILL_POSTS = 50
+FEED_PAGE_SIZE = 10
+
+# сколько комментариев показывать на странице поста, см. posts.comments
+COMMENTS_PAGE_SIZE = 20
+
+
+# Уведомления о новых постах, см. posts.live. 'database' - один поток на
+# процесс опрашивает таблицу постов и видит посты всех рабочих процессов
+# и ASGI-сервера yatube.live_asgi; 'local' - только события из сигналов
+# этого процесса, годится для одного процесса и тестов.
+LIVE_BROKER = os.getenv(
+    'LIVE_BROKER', default='local' if TESTING else 'database')
+LIVE_POLL_INTERVAL = 2
+# без SSE страница спрашивает о новых постах раз в столько секунд;
+# live_poll отвечает сразу и не держит рабочий процесс
+LIVE_CLIENT_POLL_SECONDS = 30
+# сколько секунд после создания пост может закоммититься позже постов
+# с большим id и всё равно будет доставлен
+LIVE_LATE_SECONDS = 30
+# /live/events/ обслуживает ASGI-сервер yatube.live_asgi (прокси
+# направляет туда этот путь): только тогда страницы используют SSE,
+# иначе периодический опрос live_poll
+LIVE_SSE = os.getenv('LIVE_SSE', default='') == '1'
+# сколько секунд WSGI-поток держит одно соединение SSE
+LIVE_SSE_SECONDS = 60
+
+
+# Сжатие ответов, см. core.compression: уровни для обычных ответов и
+# для тех, что сжимаются один раз и хранятся в кэше
+COMPRESSION_MIN_SIZE = 200
+COMPRESSION_LEVELS = {'gzip': 6, 'br': 4}
+COMPRESSION_CACHED_LEVELS = {'gzip': 9, 'br': 9}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -105,6 +333,39 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Политика хеширования паролей: pbkdf2, argon2 (нужен argon2-cffi),
+# bcrypt (нужен bcrypt) или fast - дешёвый MD5 только для тестов.
+PASSWORD_HASHER_POLICY = os.getenv(
+    'PASSWORD_HASHER_POLICY', default='fast' if TESTING else 'pbkdf2')
+if PASSWORD_HASHER_POLICY == 'fast' and not TESTING:
+    raise ImproperlyConfigured(
+        'PASSWORD_HASHER_POLICY=fast - несолёный MD5, только для тестов')
+
+PASSWORD_HASHER_POLICIES = {
+    'pbkdf2': 'users.hashers.PBKDF2PasswordHasher',
+    'argon2': 'users.hashers.Argon2PasswordHasher',
+    'bcrypt': 'users.hashers.BCryptSHA256PasswordHasher',
+    'fast': 'django.contrib.auth.hashers.MD5PasswordHasher',
+}
+
+# Стоимость хеширования. При её изменении пароль перехешируется
+# при следующем входе пользователя.
+PASSWORD_HASHER_COST = {
+    'pbkdf2': {'iterations': int(os.getenv('PBKDF2_ITERATIONS', default=150000))},
+    'argon2': {'time_cost': 2, 'memory_cost': 512, 'parallelism': 2},
+    'bcrypt': {'rounds': 12},
+}
+
+# Первый хешер используется для новых паролей, остальные нужны, чтобы
+# проверить старые хеши и заменить их при входе.
+PASSWORD_HASHERS = [PASSWORD_HASHER_POLICIES[PASSWORD_HASHER_POLICY]] + [
+    hasher for policy, hasher in PASSWORD_HASHER_POLICIES.items()
+    if policy not in (PASSWORD_HASHER_POLICY, 'fast')
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptPasswordHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/2.2/topics/i18n/
@@ -130,13 +391,26 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-#  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# письма ставятся в очередь и отправляются фоновым потоком
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+#  из очереди письма уходят через filebased.EmailBackend
+EMAIL_QUEUE_BACKEND = os.getenv(
+    'EMAIL_QUEUE_BACKEND',
+    default='django.core.mail.backends.filebased.EmailBackend')
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+EMAIL_QUEUE_BATCH_SIZE = 50
+# сколько секунд ждать, пока наберётся пачка
+EMAIL_QUEUE_FLUSH_INTERVAL = 0.5
+EMAIL_QUEUE_MAX_RETRIES = 3
+EMAIL_QUEUE_RETRY_DELAY = 1
+# сюда сохраняются письма, которые так и не удалось отправить
+EMAIL_DEAD_LETTER_PATH = os.path.join(BASE_DIR, 'sent_emails', 'dead')
 
 LOGGING = {
     'version': 1,
+    # не отключать логгеры, созданные до Django, например gunicorn.error
+    'disable_existing_loggers': False,
     'filters': {
         'require_debug_true': {
             '()': 'django.utils.log.RequireDebugTrue',